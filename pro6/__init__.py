@@ -1,2 +1,11 @@
 
-from pro6 import document, library, playlist, preferences, util
+import importlib
+
+__all__ = ["daemon", "document", "library", "playlist", "preferences", "util"]
+
+
+def __getattr__(name):
+    # Sub-packages are imported on first use so that importing one of them doesn't pay for all of the others.
+    if name in __all__:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
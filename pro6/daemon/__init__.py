@@ -0,0 +1,2 @@
+from .client import LibraryClient, RemoteDocument, DaemonError, connect
+from .server import RequestError, LibraryServer, LibraryService
@@ -0,0 +1,108 @@
+from ..library.index import TitleMatch
+from ..util.constants import DAEMON_HOST, DAEMON_PORT
+
+from http.client import HTTPConnection
+import json
+from urllib.parse import urlencode
+
+
+class DaemonError(Exception):
+    pass
+
+
+class RemoteDocument:
+    """ Document metadata returned by the daemon. Has the same attribute names as DocumentMetadata. """
+    def __init__(self, values):
+        self.__dict__.update(values)
+
+    def __repr__(self):
+        return "<RemoteDocument %s>" % self.name
+
+
+class LibraryClient:
+    """ Client for a running library daemon. Results mirror the DocumentLibrary methods where possible. """
+    def __init__(self, host=DAEMON_HOST, port=DAEMON_PORT, timeout=30.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._status = None
+
+    def request(self, name, params=None, post=False):
+        """ Sends a request to the daemon and returns the result. """
+        connection = HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            if post:
+                body = json.dumps(params or {})
+                connection.request("POST", "/" + name, body, {"Content-Type": "application/json"})
+            else:
+                connection.request("GET", "/" + name + ("?" + urlencode(params) if params else ""))
+            response = connection.getresponse()
+            data = json.loads(response.read() or b"{}")
+        finally:
+            connection.close()
+
+        if response.status != 200:
+            raise DaemonError(data.get("error", "Request failed with status %i." % response.status))
+        return data.get("result")
+
+    def status(self):
+        self._status = self.request("status")
+        return self._status
+
+    @property
+    def title(self):
+        return (self._status or self.status())["title"]
+
+    @property
+    def path(self):
+        return (self._status or self.status())["path"]
+
+    def get(self, title):
+        result = self.request("document", {"title": title})
+        return RemoteDocument(result) if result else None
+
+    def exists_many(self, titles):
+        return self.request("exists", {"titles": list(titles)}, post=True)
+
+    def exists(self, title):
+        return self.exists_many([title])[title]
+
+    def search(self, s, include_content=False):
+        return [RemoteDocument(d) for d in self.request("search", {"query": s, "content": int(include_content)})]
+
+    def fuzzy_search(self, query, limit=10):
+        return [TitleMatch(query, RemoteDocument(m["document"]), m["kind"], m["score"])
+                for m in self.request("fuzzy", {"query": query, "limit": limit})]
+
+    def search_text(self, query, limit=None):
+        """ Returns slide hits, best first, as dicts of document, group, slide (UUID), field, line, snippet, etc. """
+        hits = self.request("search_text", {"query": query, "limit": limit or ""})
+        for hit in hits:
+            hit["document"] = RemoteDocument(hit["document"])
+        return hits
+
+    def resolve(self, queries, limit=None, fuzzy=True):
+        results = self.request("resolve", {"queries": list(queries), "limit": limit, "fuzzy": fuzzy}, post=True)
+        return {query: [TitleMatch(query, RemoteDocument(m["document"]), m["kind"], m["score"]) for m in matches]
+                for query, matches in results.items()}
+
+    def playlist(self, names=None):
+        """ Returns a playlist node (default: the root) as a dict of name, type, path and children. """
+        return self.request("playlist", {"path": list(names or [])}, post=True)
+
+    def load_metadata(self):
+        return self.request("load_metadata", post=True)
+
+    def refresh(self):
+        return self.request("refresh", post=True)
+
+
+def connect(host=DAEMON_HOST, port=DAEMON_PORT, timeout=0.25):
+    """ Returns a LibraryClient if a daemon is running, otherwise None. """
+    client = LibraryClient(host, port, timeout)
+    try:
+        client.status()
+    except (OSError, ValueError, DaemonError):
+        return None
+    client.timeout = 30.0
+    return client
@@ -0,0 +1,230 @@
+from ..library import DocumentLibrary
+from ..library.metadata import metadata_to_dict
+from ..playlist import PlaylistDocument, PlaylistNode
+from ..preferences import get_install
+from ..util.constants import DAEMON_HOST, DAEMON_PORT
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+from urllib.parse import parse_qs, urlparse
+
+
+class RequestError(Exception):
+    """ Raised for invalid requests. Returned to the client with a 400 status. """
+    pass
+
+
+def _param(params, name):
+    if name not in params:
+        raise RequestError("Missing parameter: %s" % name)
+    return params[name]
+
+
+def _flag(params, name, default=False):
+    """ Reads a boolean parameter, which is a string when it comes from a query string. """
+    value = params.get(name, default)
+    if isinstance(value, str):
+        folded = value.strip().lower()
+        if folded in ["1", "true", "yes", "on"]:
+            return True
+        if folded in ["", "0", "false", "no", "off"]:
+            return False
+        raise RequestError("Invalid value for %s: %s" % (name, value))
+    return bool(value)
+
+
+def _list(params, name, required=True):
+    """ Reads a list parameter. A value given once in a query string is a string rather than a list. """
+    value = _param(params, name) if required else params.get(name) or []
+    return [value] if isinstance(value, str) else value
+
+
+def node_to_dict(node):
+    """ Converts a PlaylistNode to a JSON-compatible dict, including its child nodes and cues. """
+    children = []
+    for child in node.children:
+        if isinstance(child, PlaylistNode):
+            children.append(node_to_dict(child))
+        else:
+            children.append({
+                "cue": type(child).__name__,
+                "uuid": child.get_uuid() if hasattr(child, "get_uuid") else None,
+                "name": getattr(child, "display_name", None),
+                "path": getattr(child, "file_path", None) or getattr(child, "source", None)
+            })
+    return {"name": node.name, "type": node.type, "path": node.get_path(), "children": children}
+
+
+class LibraryService:
+    """
+        Keeps a document library and its playlist document loaded and answers queries against them.
+            The library is refreshed in the background and the playlist document is re-read when its file changes.
+    """
+    def __init__(self, library, playlist_path=None, refresh_interval=2.0):
+        self.library = library
+        self.playlist_path = playlist_path
+        self._playlist = None
+        self._playlist_stat = None
+        self.watcher = library.watch(refresh_interval) if refresh_interval else None
+
+    @classmethod
+    def from_install(cls, library_name=None, refresh_interval=2.0):
+        """ Creates a service for the active (or named) library of the local ProPresenter installation. """
+        install = get_install()
+        if not install:
+            raise Exception("ProPresenter installation not found.")
+
+        title = library_name or install.active_library
+        library_path = install.get_library(title)
+        if not library_path:
+            raise Exception("The library '%s' could not be found." % title)
+
+        title = {k.lower(): k for k in install.libraries}.get(title.lower())
+        library = DocumentLibrary(library_path, title)
+        return cls(library, os.path.join(install.playlist_path, title + ".pro6pl"), refresh_interval)
+
+    @property
+    def playlist(self):
+        """ The library's playlist document, re-read if the file has changed since it was last loaded. """
+        if not self.playlist_path:
+            return None
+
+        st = os.stat(self.playlist_path)
+        stat = (st.st_mtime_ns, st.st_size)
+        if stat != self._playlist_stat:
+            self._playlist = PlaylistDocument.load(self.playlist_path)
+            self._playlist_stat = stat
+        return self._playlist
+
+    def status(self, params):
+        return {
+            "title": self.library.title,
+            "path": self.library.path,
+            "documents": len(self.library.documents),
+            "metadata_loaded": self.library.metadata_loaded,
+            "playlist": self.playlist_path,
+            "errors": {file_path: str(ex) for file_path, ex in list(self.library.errors.items())},
+            "refresh_error": repr(self.watcher.last_error) if self.watcher and self.watcher.last_error else None
+        }
+
+    def document(self, params):
+        meta = self.library.get(_param(params, "title"))
+        return metadata_to_dict(meta) if meta else None
+
+    def search(self, params):
+        results = self.library.search(_param(params, "query"), _flag(params, "content"))
+        return [metadata_to_dict(meta) for meta in results]
+
+    def fuzzy(self, params):
+        matches = self.library.fuzzy_search(_param(params, "query"), int(params.get("limit", 10)))
+        return [{"document": metadata_to_dict(m.document), "kind": m.kind, "score": m.score} for m in matches]
+
+    def search_text(self, params):
+        limit = params.get("limit")
+        hits = self.library.search_text(_param(params, "query"), int(limit) if limit else None)
+        return [{"document": metadata_to_dict(h.document), "group": h.group, "slide": h.slide_uuid,
+                 "index": h.slide.index, "field": h.field, "line": h.line, "offset": h.offset,
+                 "score": h.score, "snippet": h.snippet} for h in hits]
+
+    def resolve(self, params):
+        limit = params.get("limit")
+        results = self.library.resolve(_list(params, "queries"), int(limit) if limit else None,
+                                       _flag(params, "fuzzy", True))
+        return {query: [{"document": metadata_to_dict(m.document), "kind": m.kind, "score": m.score}
+                        for m in matches]
+                for query, matches in results.items()}
+
+    def exists(self, params):
+        return self.library.exists_many(_list(params, "titles"))
+
+    def playlist_node(self, params):
+        document = self.playlist
+        if document is None:
+            return None
+        names = _list(params, "path", False)
+        node = document.find(names) if names else document.root
+        return node_to_dict(node) if node else None
+
+    def load_metadata(self, params):
+        self.library.load_metadata()
+        return {"documents": len(self.library.documents)}
+
+    def refresh(self, params):
+        events = self.library.refresh()
+        return [{"kind": e.kind, "name": e.document.name} for e in events]
+
+    def close(self):
+        if self.watcher:
+            self.watcher.stop()
+
+
+# Request path -> LibraryService method name
+ROUTES = {
+    "/status": "status",
+    "/document": "document",
+    "/search": "search",
+    "/fuzzy": "fuzzy",
+    "/search_text": "search_text",
+    "/resolve": "resolve",
+    "/exists": "exists",
+    "/playlist": "playlist_node",
+    "/load_metadata": "load_metadata",
+    "/refresh": "refresh"
+}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    def _respond(self, code, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, params):
+        url = urlparse(self.path)
+        route = ROUTES.get(url.path)
+        if route is None:
+            self._respond(404, {"error": "Unknown request: %s" % url.path})
+            return
+
+        # Query string values are used as-is, unless given more than once.
+        for key, values in parse_qs(url.query).items():
+            params.setdefault(key, values[0] if len(values) == 1 else values)
+
+        try:
+            self._respond(200, {"result": getattr(self.server.service, route)(params)})
+        except RequestError as ex:
+            self._respond(400, {"error": str(ex)})
+        except Exception as ex:
+            self._respond(500, {"error": str(ex)})
+
+    def do_GET(self):
+        self._handle({})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._respond(400, {"error": "Request body is not valid JSON."})
+            return
+        self._handle(params if isinstance(params, dict) else {})
+
+    def log_message(self, fmt, *args):
+        pass    # Keep the console quiet; errors are returned to the client.
+
+
+class LibraryServer(ThreadingHTTPServer):
+    """ Serves a LibraryService over HTTP on the local machine. """
+    daemon_threads = True
+
+    def __init__(self, service, host=DAEMON_HOST, port=DAEMON_PORT):
+        super().__init__((host, port), _RequestHandler)
+        self.service = service
+
+    def server_close(self):
+        super().server_close()
+        self.service.close()
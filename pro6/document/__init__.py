@@ -4,3 +4,4 @@ from .cues import MediaCue, AudioCue, TimeBasedCue
 from .presentation import PresentationDocument
 from .slide import DisplaySlide
 from .timeline import Timeline, TimelineCue
+from .cache import CacheStats, DocumentCache, DocumentHandle, ReadOnlyView
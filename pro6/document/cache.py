@@ -0,0 +1,246 @@
+from .presentation import PresentationDocument
+
+from collections import OrderedDict
+from datetime import datetime
+import os
+import pickle
+import threading
+from types import MappingProxyType
+
+
+DEFAULT_CACHE_SIZE = 64 * 1024 * 1024
+
+# Attribute values of these types can be read from the shared document, as they can't be changed in place.
+IMMUTABLE_TYPES = (str, bytes, int, float, bool, type(None), datetime, frozenset)
+
+# Methods of document objects that don't change them, which can be called through a read-only view.
+READ_ONLY_METHODS = {"slides", "get_display_name", "get_angle", "get_length"}
+
+# A cached document (including the pickled form kept for making copies) uses roughly this many times its file size.
+DOCUMENT_SIZE_FACTOR = 3
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0          # Documents removed to stay within the memory budget
+        self.invalidations = 0      # Cached documents found to be out of date with their files
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __repr__(self):
+        return "<CacheStats hits=%i misses=%i evictions=%i invalidations=%i>" % \
+               (self.hits, self.misses, self.evictions, self.invalidations)
+
+
+class _CacheEntry:
+    def __init__(self, stat, document):
+        self.stat = stat                # (mtime, size) of the file when it was read
+        self.document = document        # Shared instance, never modified
+        self.size = stat[1] * DOCUMENT_SIZE_FACTOR
+        self._pickled = None
+        self._lock = threading.Lock()
+
+    def copy(self):
+        # Unpickling is several times faster than parsing the XML again or using copy.deepcopy().
+        with self._lock:
+            if self._pickled is None:
+                self._pickled = pickle.dumps(self.document, pickle.HIGHEST_PROTOCOL)
+        return pickle.loads(self._pickled)
+
+
+def read_only(value):
+    """ Returns a value from a cached document as it can be shared: immutable values as they are, others in views. """
+    if isinstance(value, IMMUTABLE_TYPES):
+        return value
+    elif isinstance(value, (list, tuple)):
+        return tuple(read_only(v) for v in value)
+    elif isinstance(value, dict):
+        return MappingProxyType({k: read_only(v) for k, v in value.items()})
+    elif isinstance(value, set):
+        return frozenset(value)
+    return ReadOnlyView(value)
+
+
+class ReadOnlyView:
+    """
+        A read-only view of an object in a cached document. Attribute values are read-only too: lists become tuples
+            and objects become views. Only READ_ONLY_METHODS can be called, and anything that would change the object
+            raises AttributeError.
+    """
+    __slots__ = ["_target"]
+
+    def __init__(self, target):
+        object.__setattr__(self, "_target", target)
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if callable(value) and not isinstance(value, type):
+            if name not in READ_ONLY_METHODS:
+                raise AttributeError("'%s' could change a shared document. Call edit() on its handle first." % name)
+            return lambda *args, **kwargs: read_only(value(*args, **kwargs))
+        return read_only(value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("A shared document can't be changed. Call edit() on its handle first.")
+
+    def __delattr__(self, name):
+        raise AttributeError("A shared document can't be changed. Call edit() on its handle first.")
+
+    def __iter__(self):
+        return (read_only(v) for v in self._target)
+
+    def __len__(self):
+        return len(self._target)
+
+    def __getitem__(self, key):
+        return read_only(self._target[key])
+
+    def __bool__(self):
+        return bool(self._target)
+
+    def __eq__(self, other):
+        return self._target == (other._target if isinstance(other, ReadOnlyView) else other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __str__(self):
+        return str(self._target)
+
+    def __repr__(self):
+        return "<ReadOnlyView %r>" % self._target
+
+
+class DocumentHandle:
+    """
+        A copy-on-write reference to a cached PresentationDocument.
+            Until the handle is changed, attributes are read from the shared cached document without copying it:
+            immutable values (strings, numbers, etc.) as they are and anything else through a ReadOnlyView, so
+            lists are tuples and nested objects can't be changed. Calling edit(), setting an attribute or calling a
+            method that could change the document gives the handle its own copy first, and from then on attributes
+            are the copy's own. Changes never reach the cache or other handles.
+    """
+    def __init__(self, entry, file_path):
+        object.__setattr__(self, "_entry", entry)
+        object.__setattr__(self, "_copy", None)
+        object.__setattr__(self, "file_path", file_path)
+
+    @property
+    def modified(self):
+        """ True if the handle has its own copy of the document. """
+        return self._copy is not None
+
+    @property
+    def document(self):
+        """ The handle's current document. Unless edit() has been called this is shared and must not be changed. """
+        return self._copy if self._copy is not None else self._entry.document
+
+    def read_only(self):
+        """ Returns a ReadOnlyView of the handle's current document, for reading it without making a copy. """
+        return ReadOnlyView(self.document)
+
+    def edit(self):
+        """ Returns the handle's own copy of the document, making it on first use. """
+        if self._copy is None:
+            object.__setattr__(self, "_copy", self._entry.copy())
+        return self._copy
+
+    def write(self, file_path=None):
+        """ Writes the handle's copy of the document. """
+        return self.edit().write(file_path)
+
+    def __getattr__(self, name):
+        if self._copy is not None:
+            return getattr(self._copy, name)
+
+        value = getattr(self._entry.document, name)
+        if callable(value) and not isinstance(value, type) and name not in READ_ONLY_METHODS:
+            return getattr(self.edit(), name)     # Could change the document, so it's called on a copy.
+        return getattr(ReadOnlyView(self._entry.document), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.edit(), name, value)
+
+    def __repr__(self):
+        return "<DocumentHandle %s%s>" % (self.file_path, " (modified)" if self.modified else "")
+
+
+class DocumentCache:
+    """
+        Keeps recently loaded documents in memory, up to an approximate memory budget in bytes.
+            Documents are keyed by path and reloaded if the file's modified time or size changes. The least recently
+            used documents are dropped first. Safe to share between threads.
+    """
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, loader=PresentationDocument.load):
+        self.max_size = max_size
+        self.loader = loader
+        self.size = 0
+        self.stats = CacheStats()
+        self._entries = OrderedDict()       # Normalized path -> _CacheEntry, least recently used first
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, file_path):
+        return os.path.normcase(os.path.abspath(file_path)) in self._entries
+
+    def _entry(self, file_path):
+        key = os.path.normcase(os.path.abspath(file_path))
+        st = os.stat(file_path)
+        stat = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.stat == stat:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return entry
+                self._remove(key)
+                self.stats.invalidations += 1
+            self.stats.misses += 1
+
+        # Read outside of the lock so other documents can be served meanwhile.
+        entry = _CacheEntry(stat, self.loader(file_path))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if entry.size <= self.max_size:
+                self._entries[key] = entry
+                self.size += entry.size
+                self._evict()
+        return entry
+
+    def _remove(self, key):
+        self.size -= self._entries.pop(key).size
+
+    def _evict(self):
+        while self.size > self.max_size and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.stats.evictions += 1
+
+    def load(self, file_path):
+        """ Returns a DocumentHandle for a document, reading the file only if it isn't cached or has changed. """
+        return DocumentHandle(self._entry(file_path), file_path)
+
+    def load_copy(self, file_path):
+        """ Returns a private copy of a document, which can be changed freely. """
+        return self._entry(file_path).copy()
+
+    def invalidate(self, file_path=None):
+        """ Removes one document, or every document if no path is given, from the cache. """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self.size = 0
+            else:
+                key = os.path.normcase(os.path.abspath(file_path))
+                if key in self._entries:
+                    self._remove(key)
@@ -1,7 +1,7 @@
 
 from .elements import MEDIA_ELEMENTS, MediaElement, AudioElement
 
-from ..preferences import install as pro6_install
+from ..preferences import get_install
 
 from ..util.constants import *
 from ..util.general import unprepare_path
@@ -30,6 +30,7 @@ class MediaCue(XmlBackedObject):
 
     def reset_thumbnail(self):
         """ Resets the cached thumbnail for this element. """
+        pro6_install = get_install()
         if not pro6_install:
             raise Exception("ProPresenter installation not found.")
 
@@ -1,8 +1,11 @@
 
 from ..util.constants import *
 from ..util.general import prepare_path, unprepare_path
+from ..util.intern import payload_pool
+from ..util.rtf import rtf_to_text
 from ..util.media import MediaFile, MEDIA_FORMATS, InvalidMediaFileError
-from ..util.xmlhelp import RV_XML_VARNAME, XmlBackedObject, ColorString, Rect3D, PointXY, Shadow, Stroke
+from ..util.xmlhelp import RV_XML_VARNAME, XmlBackedObject, ColorString, Rect3D, PointXY, Shadow, Stroke, \
+    default_element
 
 import base64
 import xml.etree.ElementTree as Xml
@@ -47,9 +50,10 @@ class DisplayElement(XmlBackedObject):
         super().set_uuid()
 
         e = super().write()
-        e.append((self.position or Rect3D()).write("position"))
-        e.append((self.shadow or Shadow()).write("shadow"))
-        e.append((self.stroke or Stroke()).write())
+        # Elements without their own geometry get copies of XML written once for the default values.
+        e.append(self.position.write("position") if self.position else default_element(Rect3D, "position"))
+        e.append(self.shadow.write("shadow") if self.shadow else default_element(Shadow, "shadow"))
+        e.append(self.stroke.write() if self.stroke else default_element(Stroke))
         return e
 
     def read(self, element):
@@ -80,13 +84,18 @@ class TextElement(DisplayElement):
         self.flow_data = ""
         self.font_data = ""
 
+    @property
+    def plain_text(self):
+        """ The element's text, taken from the RTF if the plain text is empty (as in some Mac documents). """
+        return self.text or rtf_to_text(self.rtf)
+
     def write(self):
         attrib = {
             "adjustsHeightToFit": self.adjust_to_fit,
             "verticalAlignment": self.vertical_align,
             "revealType": self.reveal
         }
-        super()._attrib.update(attrib)
+        super().update(attrib)
         e = super().write()
 
         pairs = [
@@ -97,7 +106,7 @@ class TextElement(DisplayElement):
         ]
         for var, value in pairs:
             sub = Xml.Element("NSString", {RV_XML_VARNAME: var})
-            sub.text = base64.b64encode(value).decode('ascii')
+            sub.text = base64.b64encode((value or "").encode('utf-8')).decode('ascii')
             e.append(sub)
         return e
 
@@ -111,8 +120,9 @@ class TextElement(DisplayElement):
         data = {"RTFData": "", "PlainText": "", "WinFlowData": "", "WinFontData": ""}
         for key in data.keys():
             sub = element.find("NSString[@" + RV_XML_VARNAME + "='" + key + "']")
-            if sub:
-                data[key] = base64.b64decode(sub.text).decode('ascii')
+            if sub is not None and sub.text:
+                # Font and flow data (and often RTF) is the same for many elements, so one copy is shared.
+                data[key] = payload_pool(base64.b64decode(sub.text).decode('utf-8'))
 
         self.text = data["PlainText"]
         self.rtf = data["RTFData"]
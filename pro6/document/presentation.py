@@ -4,11 +4,13 @@ from .group import SlideGroup
 from .slide import DisplaySlide
 from .timeline import Timeline
 
-from ..preferences import install as pro6_install
+from ..preferences import get_install
 
+from ..util.aio import EXECUTOR_PARSE, EXECUTOR_WRITE, resolve_executor
 from ..util.compat import *
 from ..util.constants import RV_VERSION_NUMBER
 from ..util.general import parse_date
+from ..util.locks import FileLock, write_atomic
 from ..util.xmlhelp import XmlBackedObject, create_array, RV_XML_VARNAME
 
 from os import path
@@ -34,6 +36,7 @@ class PresentationDocument(XmlBackedObject):
         self.category = category
 
         # System settings will be used for some default values if not specified.
+        pro6_install = get_install() if not (height and width) else None
         self.height = height or (pro6_install.output_height if pro6_install else 720)
         self.width = width or (pro6_install.output_width if pro6_install else 1280)
 
@@ -125,10 +128,11 @@ class PresentationDocument(XmlBackedObject):
         e.append(create_array("groups", self.groups))
         e.append(create_array("arrangements", self.arrangements))
 
-        # Save the document to disk.
+        # Save the document to disk. Other writers wait, and readers see either the old or new file.
         self.path = file_path or self.path
         if self.path:
-            Xml.ElementTree(e).write(self.path, encoding="utf-8", xml_declaration=True)
+            with FileLock(self.path):
+                write_atomic(self.path, Xml.tostring(e, encoding="utf-8", xml_declaration=True))
         return e
 
     def read(self, element):
@@ -167,3 +171,18 @@ class PresentationDocument(XmlBackedObject):
         document.path = file_path
 
         return document
+
+    @classmethod
+    async def aload(cls, file_path, executor=None):
+        """ Loads a document without blocking the event loop. See pro6.util.aio for executor settings. """
+        return await resolve_executor(executor, EXECUTOR_PARSE).run(cls.load, file_path)
+
+    @classmethod
+    async def aload_all(cls, file_paths, executor=None):
+        """ Loads many documents concurrently, yielding each one as soon as it has been read. """
+        async for document in resolve_executor(executor, EXECUTOR_PARSE).imap(cls.load, file_paths):
+            yield document
+
+    async def awrite(self, file_path=None, executor=None):
+        """ Writes the document without blocking the event loop. """
+        return await resolve_executor(executor, EXECUTOR_WRITE).run(self.write, file_path)
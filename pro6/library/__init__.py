@@ -1,3 +1,14 @@
-
+from .audit import MediaAudit, audit_media
+from .catalog import LibraryCatalog
+from .columns import ColumnarCatalog
+from .export import export_records, read_document, write_ndjson
+from .index import KeyIndex, SortedIndex, TitleIndex, TitleMatch, TrigramIndex
 from .library import DocumentLibrary
+from .media_index import MediaIndex
 from .metadata import DocumentMetadata
+from .relocate import RelocationRule, relocate_media
+from .replace import TextChange, TextReplacement, format_changes, replace_documents
+from .rescale import Rescale, rescale_document, rescale_documents, RESCALE_STRETCH, RESCALE_FIT, RESCALE_FILL
+from .stream import MediaReference, iter_media
+from .text_index import SlideText, TextHit, TextIndex, iter_slide_text, FIELD_TEXT, FIELD_NOTES
+from .watch import LibraryEvent, LibraryWatcher, EVENT_ADDED, EVENT_UPDATED, EVENT_DELETED
@@ -0,0 +1,56 @@
+from .stream import iter_media
+
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+
+
+DEFAULT_STAT_WORKERS = 32
+
+
+class MediaAudit:
+    def __init__(self):
+        self.files = []         # Documents and playlists that were scanned
+        self.references = []    # Every media reference found, in file order
+        self.checked = 0        # Number of distinct media paths checked
+        self.missing = {}       # Document path -> list of MediaReference objects whose file is missing
+        self.errors = {}        # Path of each file that couldn't be read -> exception raised
+
+    @property
+    def missing_count(self):
+        return sum(len(refs) for refs in self.missing.values())
+
+    def missing_paths(self):
+        """ Returns the distinct media paths that could not be found. """
+        return sorted({ref.path for refs in self.missing.values() for ref in refs})
+
+
+def _collect(file_path):
+    try:
+        return list(iter_media(file_path))
+    except Exception as ex:
+        return ex
+
+
+def audit_media(files, workers=None):
+    """
+        Checks that every media file referenced by the given documents and playlists exists.
+            Files are read and media paths are checked concurrently. Each distinct path is only checked once.
+    """
+    audit = MediaAudit()
+    audit.files = list(files)
+
+    with ThreadPoolExecutor(workers or DEFAULT_STAT_WORKERS) as pool:
+        for file_path, refs in zip(audit.files, pool.map(_collect, audit.files)):
+            if isinstance(refs, Exception):
+                audit.errors[file_path] = refs
+            else:
+                audit.references.extend(refs)
+
+        sources = list({ref.path for ref in audit.references})
+        found = dict(zip(sources, pool.map(path.isfile, sources)))
+
+    audit.checked = len(sources)
+    for ref in audit.references:
+        if not found[ref.path]:
+            audit.missing.setdefault(ref.document, []).append(ref)
+    return audit
@@ -0,0 +1,139 @@
+from .columns import ColumnarCatalog
+from .index import MATCH_FUZZY
+from .library import DocumentLibrary
+from ..preferences import get_install
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+
+
+DEFAULT_DEVICE_WORKERS = 4
+
+
+def _device(library_path):
+    try:
+        return os.stat(library_path).st_dev
+    except OSError:
+        return None
+
+
+class LibraryCatalog:
+    """
+        A combined view of several document libraries. Every document is tagged with its library's title.
+            Libraries are scanned concurrently, with a separate group of workers for each storage device.
+    """
+    def __init__(self, libraries):
+        self.paths = dict(libraries)    # Library title -> path
+        self.libraries = {}             # Library title -> DocumentLibrary
+        self.errors = {}                # Library title -> exception raised while scanning
+
+    @classmethod
+    def from_install(cls, install=None):
+        """ Creates a catalog of every library configured in a ProPresenter installation. """
+        install = install or get_install()
+        if not install:
+            raise Exception("ProPresenter installation not found.")
+        return cls(install.libraries)
+
+    def __len__(self):
+        return sum(len(library.documents) for library in self.libraries.values())
+
+    def _scan_library(self, title, pool, load_metadata):
+        library = DocumentLibrary(self.paths[title], title)
+        if load_metadata:
+            library.load_metadata(pool)
+        return library
+
+    def _scan_device(self, titles, workers, load_metadata):
+        results = {}
+        with ThreadPoolExecutor(workers) as pool:
+            for title in titles:
+                try:
+                    results[title] = self._scan_library(title, pool, load_metadata)
+                except Exception as ex:
+                    results[title] = ex
+        return results
+
+    def scan(self, load_metadata=True, device_workers=None):
+        """ Lists (and optionally reads the metadata of) every library, one worker group per storage device. """
+        devices = {}
+        for title, library_path in self.paths.items():
+            devices.setdefault(_device(library_path), []).append(title)
+
+        self.libraries = {}
+        self.errors = {}
+        with ThreadPoolExecutor(len(devices) or 1) as pool:
+            groups = [pool.submit(self._scan_device, titles, device_workers or DEFAULT_DEVICE_WORKERS, load_metadata)
+                      for titles in devices.values()]
+            for group in groups:
+                for title, result in group.result().items():
+                    if isinstance(result, Exception):
+                        self.errors[title] = result
+                    else:
+                        self.libraries[title] = result
+
+        # Keep the configured order of the libraries.
+        self.libraries = {title: self.libraries[title] for title in self.paths if title in self.libraries}
+        return self
+
+    def documents(self):
+        """ Yields the metadata of every document in every library. """
+        for library in self.libraries.values():
+            with library.lock.read():
+                documents = list(library.documents.values())
+            yield from documents
+
+    def columns(self, use_numpy=True):
+        """ Returns a ColumnarCatalog of every document's metadata, for fast filtering and reporting. """
+        return ColumnarCatalog(self.documents(), use_numpy)
+
+    def get(self, title, library=None):
+        """ Returns the first document with the given title (case-insensitive), optionally in a specific library. """
+        for name, lib in self.libraries.items():
+            if library is None or name.lower() == library.lower():
+                meta = lib.get(title)
+                if meta:
+                    return meta
+        return None
+
+    def search(self, s, include_content=False, flags=re.IGNORECASE):
+        """ Searches the titles (and optionally content) of every library. See DocumentLibrary.search(). """
+        return [meta for library in self.libraries.values() for meta in library.search(s, include_content, flags)]
+
+    def fuzzy_search(self, query, limit=10, min_score=0.3):
+        """ Finds documents with similar titles in every library. Returns a list of TitleMatch, best first. """
+        matches = [m for library in self.libraries.values() for m in library.fuzzy_search(query, limit, min_score)]
+        return sorted(matches, key=lambda m: m.score, reverse=True)[:limit]
+
+    def resolve(self, queries, limit=None, fuzzy=True):
+        """ Resolves many titles against every library. Returns a dict of query -> list of TitleMatch, best first. """
+        queries = list(queries)
+        results = {query: [] for query in queries}
+        for library in self.libraries.values():
+            for query, matches in library.resolve(queries, limit, fuzzy).items():
+                results[query].extend(matches)
+
+        for query, matches in results.items():
+            # Better kinds of matches first, then by score. Fuzzy matches from other libraries are dropped when
+            #   any library had a better match.
+            matches.sort(key=lambda m: (m.kind, -m.score))
+            if matches and matches[0].kind != MATCH_FUZZY:
+                matches[:] = [m for m in matches if m.kind != MATCH_FUZZY]
+            if limit:
+                del matches[limit:]
+        return results
+
+    def stats(self):
+        """ Returns document, slide, category and usage totals for the whole catalog and for each library. """
+        totals = {"documents": 0, "slides": 0, "unused": 0, "categories": {}, "libraries": {}}
+        for title, library in self.libraries.items():
+            lib_totals = {"documents": 0, "slides": 0, "unused": 0, "categories": {}}
+            for meta in library.documents.values():
+                for t in [totals, lib_totals]:
+                    t["documents"] += 1
+                    t["slides"] += meta.slide_count
+                    t["unused"] += 0 if meta.last_used else 1
+                    t["categories"][meta.category] = t["categories"].get(meta.category, 0) + 1
+            totals["libraries"][title] = lib_totals
+        return totals
@@ -0,0 +1,178 @@
+from array import array
+from datetime import datetime
+import heapq
+import math
+import operator
+
+
+# Column name -> array type code. Category and library are stored as integer codes into a list of labels.
+COLUMNS = {
+    "category": "l",
+    "library": "l",
+    "last_used": "d",       # POSIX timestamp, NaN if never used
+    "used_count": "q",
+    "slide_count": "q",
+    "width": "q",
+    "height": "q",
+    "ccli": "q"             # CCLI song number, 0 if not set
+}
+CODED_COLUMNS = ["category", "library"]
+
+_OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "lt": operator.lt,
+    "le": operator.le,
+    "gt": operator.gt,
+    "ge": operator.ge
+}
+
+
+def _numpy():
+    # NumPy is optional and slow to import, so it's only loaded when a catalog is built.
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def _ccli_number(meta):
+    number = meta.copyright.number if meta.copyright else None
+    try:
+        return int(number) if number else 0
+    except ValueError:
+        return 0
+
+
+class ColumnarCatalog:
+    """
+        Column-oriented copy of document metadata for fast filtering, grouping and ranking.
+            Columns are NumPy arrays when NumPy is installed, otherwise standard library arrays.
+            Row numbers returned by select() index into the 'documents' list.
+    """
+    def __init__(self, documents, use_numpy=True):
+        self.documents = list(documents)
+        self.labels = {name: [] for name in CODED_COLUMNS}      # Coded column -> list of labels (code = position)
+        self.np = _numpy() if use_numpy else None
+
+        codes = {name: {} for name in CODED_COLUMNS}
+        values = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        for meta in self.documents:
+            for name, label in [("category", meta.category), ("library", meta.library)]:
+                if label not in codes[name]:
+                    codes[name][label] = len(self.labels[name])
+                    self.labels[name].append(label)
+                values[name].append(codes[name][label])
+
+            values["last_used"].append(meta.last_used.timestamp() if meta.last_used else math.nan)
+            values["used_count"].append(meta.used_count)
+            values["slide_count"].append(meta.slide_count)
+            values["width"].append(meta.width)
+            values["height"].append(meta.height)
+            values["ccli"].append(_ccli_number(meta))
+
+        if self.np:
+            self.columns = {name: self.np.frombuffer(column, dtype=column.typecode).copy()
+                            for name, column in values.items()}
+        else:
+            self.columns = values
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _value(self, column, value):
+        if column in CODED_COLUMNS:
+            labels = self.labels[column]
+            return labels.index(value) if value in labels else -1
+        elif isinstance(value, datetime):
+            return value.timestamp()
+        return value
+
+    def select(self, rows=None, never_used=None, **conditions):
+        """
+            Returns the row numbers matching every condition, optionally within a subset of rows.
+                Conditions are given as column=value or column__op=value where op is one of
+                eq, ne, lt, le, gt, ge. For example: select(category="Songs", last_used__lt=cutoff).
+                Dates can be given as datetime objects. Documents that were never used don't match any
+                last_used condition; use never_used=True/False to select them.
+        """
+        tests = []
+        for key, value in conditions.items():
+            column, _, op = key.partition("__")
+            if column not in COLUMNS or (op and op not in _OPERATORS):
+                raise ValueError("Unrecognized condition: %s" % key)
+            tests.append((self.columns[column], _OPERATORS[op or "eq"], self._value(column, value)))
+
+        if self.np:
+            np = self.np
+            mask = np.ones(len(self.documents), dtype=bool)
+            for data, func, value in tests:
+                mask &= func(data, value)
+            if never_used is not None:
+                mask &= np.isnan(self.columns["last_used"]) == never_used
+            matches = np.flatnonzero(mask)
+            return matches if rows is None else np.intersect1d(matches, rows)
+
+        candidates = range(len(self.documents)) if rows is None else rows
+        last_used = self.columns["last_used"]
+        return [i for i in candidates
+                if all(func(data[i], value) for data, func, value in tests)
+                and (never_used is None or math.isnan(last_used[i]) == never_used)]
+
+    def unused_since(self, when, rows=None):
+        """ Returns the row numbers of documents that have not been used since the given date (or ever). """
+        before = self.select(rows, last_used__lt=when)
+        never = self.select(rows, never_used=True)
+        if self.np:
+            return self.np.union1d(before, never)
+        return sorted(set(before) | set(never))
+
+    def group_count(self, column, rows=None):
+        """ Returns a dict of value (or label) -> number of rows, for all or some rows. """
+        data = self.columns[column]
+        if self.np:
+            data = data if rows is None else data[rows]
+            if column in CODED_COLUMNS:
+                counts = self.np.bincount(data, minlength=len(self.labels[column]))
+                return {label: int(n) for label, n in zip(self.labels[column], counts) if n}
+            values, counts = self.np.unique(data, return_counts=True)
+            return {v.item(): int(n) for v, n in zip(values, counts)}
+
+        counts = {}
+        for i in (range(len(data)) if rows is None else rows):
+            counts[data[i]] = counts.get(data[i], 0) + 1
+        if column in CODED_COLUMNS:
+            return {self.labels[column][code]: n for code, n in counts.items()}
+        return counts
+
+    def group_by(self, column, rows=None):
+        """ Returns a dict of value (or label) -> list of row numbers, for all or some rows. """
+        data = self.columns[column]
+        groups = {}
+        for i in (range(len(data)) if rows is None else rows):
+            value = data[int(i)]
+            key = self.labels[column][int(value)] if column in CODED_COLUMNS else value
+            groups.setdefault(key, []).append(int(i))
+        return groups
+
+    def top_k(self, column, k, rows=None, largest=True):
+        """ Returns the row numbers with the k largest (or smallest) values of a column, best first. """
+        data = self.columns[column]
+        if self.np:
+            np = self.np
+            rows = np.arange(len(data)) if rows is None else np.asarray(rows)
+            values = data[rows] if largest else -data[rows]
+            if k < len(rows):
+                part = np.argpartition(-values, k)[:k]
+            else:
+                part = np.arange(len(rows))
+            return rows[part[np.argsort(-values[part], kind="stable")]]
+
+        candidates = range(len(data)) if rows is None else rows
+        pick = heapq.nlargest if largest else heapq.nsmallest
+        return pick(k, candidates, key=lambda i: data[i])
+
+    def rows_to_documents(self, rows):
+        """ Returns the document metadata for a list of row numbers. """
+        return [self.documents[int(i)] for i in rows]
@@ -0,0 +1,174 @@
+from .metadata import DocumentMetadata, metadata_to_dict
+from .stream import MEDIA_SOURCE_TAGS, REF_BACKGROUND, media_kind
+from .text_index import TEXT_VARNAMES, element_text
+from ..util.general import unprepare_path
+from ..util.xmlhelp import RV_XML_VARNAME
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import base64
+import json
+import os
+import sys
+import xml.etree.ElementTree as Xml
+
+
+# Number of documents read ahead of the output for each worker.
+READ_AHEAD = 4
+
+
+def _get_uuid(element):
+    return element.get("UUID") or element.get("uuid")
+
+
+def read_document(file_path, library=None):
+    """
+        Reads a presentation document into a JSON-compatible dict in a single streaming pass: its metadata
+            (including CCLI), its groups and their slides (label, notes, decoded text and media), and all of its
+            media references. Elements are discarded as soon as each slide has been read.
+    """
+    meta = DocumentMetadata(file_path)
+    meta.library = library
+    groups = []
+    media = []
+    stack = []          # The currently open elements
+    slide = None        # The current slide's dict, while it's being read
+    strings = {}        # Varname -> decoded text of the current text element
+    index = 0
+
+    for event, element in Xml.iterparse(file_path, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            parent = stack[-1] if stack else None
+            stack.append(element)
+            if parent is None:
+                meta.read_attributes(element)
+            elif tag == "RVSlideGrouping":
+                groups.append({"name": element.get("name") or "", "uuid": _get_uuid(element), "slides": []})
+            elif tag == "RVDisplaySlide":
+                slide = {"uuid": _get_uuid(element), "index": index, "label": element.get("label") or "",
+                         "notes": element.get("notes") or "", "enabled": element.get("enabled") != "false",
+                         "text": [], "media": []}
+                strings = {}
+            elif tag in MEDIA_SOURCE_TAGS and element.get("source"):
+                reference = {"path": unprepare_path(element.get("source")), "kind": media_kind(parent),
+                             "slide": slide["uuid"] if slide is not None else None}
+                media.append(reference)
+                if slide is not None:
+                    slide["media"].append(reference["path"])
+            continue
+
+        stack.pop()
+        if tag == "NSString" and slide is not None and element.get(RV_XML_VARNAME) in TEXT_VARNAMES:
+            if element.text:
+                strings[element.get(RV_XML_VARNAME)] = base64.b64decode(element.text).decode("utf-8")
+        elif tag == "RVTextElement" and slide is not None:
+            text = element_text(strings.get("PlainText"), strings.get("RTFData"))
+            if text:
+                slide["text"].append(text)
+            strings = {}
+        elif tag == "RVDisplaySlide":
+            slide["text"] = "\n".join(slide["text"])
+            if not groups:
+                groups.append({"name": "", "uuid": None, "slides": []})
+            groups[-1]["slides"].append(slide)
+            slide = None
+            index += 1
+            element.clear()
+
+    meta.slide_count = index
+    meta.media = [reference["path"] for reference in media if reference["kind"] == REF_BACKGROUND]
+    meta.loaded = True
+
+    record = metadata_to_dict(meta)
+    record["groups"] = groups
+    record["references"] = media
+    return record
+
+
+def slide_records(document):
+    """ Splits a document record from read_document() into one record per slide. """
+    info = {k: v for k, v in document.items() if k not in ["groups", "references"]}
+    for group in document["groups"]:
+        for slide in group["slides"]:
+            record = {"document": info, "group": group["name"], "group_uuid": group["uuid"]}
+            record.update(slide)
+            yield record
+
+
+def read_records(file_path, per_slide=False, library=None):
+    """ Returns the export records of a document as a list: one for the document, or one for each slide. """
+    document = read_document(file_path, library)
+    return list(slide_records(document)) if per_slide else [document]
+
+
+def _imap(executor, func, items, ordered, window):
+    """ Calls a function for each item on an executor, keeping at most 'window' calls in progress. """
+    items = iter(items)
+    pending = deque()
+    try:
+        while True:
+            for item in items:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= window:
+                    break
+            if not pending:
+                return
+
+            if ordered:
+                yield pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+                    yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def export_records(files, per_slide=False, library=None, ordered=True, workers=None, executor=None):
+    """
+        Reads many documents in parallel, yielding their export records as they're ready. With 'ordered' the
+            records come in the same order as the files; otherwise in the order they finish. Only a few documents
+            per worker are read ahead, so memory use doesn't grow with the size of the library. An executor (such
+            as a ProcessPoolExecutor) can be given instead of a number of workers. Unreadable documents are skipped.
+    """
+    own_executor = executor is None
+    executor = executor or ThreadPoolExecutor(workers)
+    window = READ_AHEAD * (workers or os.cpu_count() or 1)
+    try:
+        for records in _imap(executor, _RecordReader(per_slide, library), files, ordered, window):
+            yield from records
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
+
+
+class _RecordReader:
+    """ Reads the export records of a document. A class rather than a closure so it can be sent to other processes. """
+    def __init__(self, per_slide, library):
+        self.per_slide = per_slide
+        self.library = library
+
+    def __call__(self, file_path):
+        try:
+            return read_records(file_path, self.per_slide, self.library)
+        except (OSError, Xml.ParseError, ValueError) as ex:
+            print("Unable to export document '%s': %s" % (file_path, ex), file=sys.stderr)
+            return []
+
+
+def write_ndjson(records, output=None):
+    """ Writes records as newline-delimited JSON to a file object or path (default: stdout). Returns the count. """
+    if isinstance(output, str):
+        with open(output, "w", encoding="utf-8", newline="\n") as f:
+            return write_ndjson(records, f)
+
+    output = output or sys.stdout
+    count = 0
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        count += 1
+    output.flush()
+    return count
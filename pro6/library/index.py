@@ -0,0 +1,287 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter
+import heapq
+import re
+
+
+# Kinds of title matches, in order of preference.
+MATCH_EXACT = 0         # Title is identical to the query
+MATCH_CASELESS = 1      # Title matches the query ignoring case
+MATCH_PREFIX = 2        # Title starts with the query
+MATCH_CONTAINS = 3      # Title contains the query
+MATCH_FUZZY = 4         # Title is similar to the query
+
+
+class TitleMatch:
+    def __init__(self, query, document, kind, score=1.0):
+        self.query = query
+        self.document = document
+        self.kind = kind
+        self.score = score
+
+    def __repr__(self):
+        return "<TitleMatch %i (%.2f): %s>" % (self.kind, self.score, self.document.name)
+
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def trigrams(text):
+    """ Returns the set of 3-character sequences in a string, ignoring case and punctuation. """
+    s = "  " + _NON_WORD.sub(" ", text.lower()).strip() + " "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def search_texts(meta):
+    """ Returns the strings a document can be found by: its title, plus its CCLI title and artist when loaded. """
+    texts = [meta.name]
+    ccli = meta.copyright
+    if ccli:
+        if ccli.title and ccli.title.lower() != meta.name.lower():
+            texts.append(ccli.title)
+        if ccli.artist:
+            texts.append(meta.name + " " + ccli.artist)
+    return texts
+
+
+class TrigramIndex:
+    """
+        Similarity search over short strings (document titles) using trigrams.
+            Each document can be indexed under several strings and is scored by the best of them.
+    """
+    def __init__(self):
+        self._entries = {}      # entry id -> (metadata, set of trigrams)
+        self._postings = {}     # trigram -> set of entry ids
+        self._documents = {}    # metadata -> [entry ids]
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, meta, *texts):
+        """ Indexes a document under the given strings (default: its title), replacing any previous entries. """
+        self.remove(meta)
+
+        ids = []
+        for text in (texts or [meta.name]):
+            grams = trigrams(text)
+            if not grams:
+                continue
+
+            entry = self._next_id
+            self._next_id += 1
+            self._entries[entry] = (meta, grams)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(entry)
+            ids.append(entry)
+        self._documents[meta] = ids
+
+    def remove(self, meta):
+        """ Removes a document from the index. """
+        for entry in self._documents.pop(meta, []):
+            for gram in self._entries.pop(entry)[1]:
+                postings = self._postings[gram]
+                postings.discard(entry)
+                if not postings:
+                    del self._postings[gram]
+
+    def search(self, query, limit=10, min_score=0.3):
+        """ Returns up to 'limit' (metadata, score) pairs, most similar first. Scores range from 0 to 1. """
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        counts = Counter()
+        for gram in grams:
+            counts.update(self._postings.get(gram, ()))
+
+        # Dice coefficient of each entry, keeping the best entry for each document.
+        best = {}
+        size = len(grams)
+        for entry, shared in counts.items():
+            meta, entry_grams = self._entries[entry]
+            score = 2.0 * shared / (size + len(entry_grams))
+            if score >= min_score and score > best.get(meta, 0):
+                best[meta] = score
+        return heapq.nlargest(limit, best.items(), key=lambda pair: pair[1])
+
+
+class TitleIndex:
+    """ Lookup of document metadata by title, supporting exact, case-insensitive, prefix and fuzzy matches. """
+    def __init__(self, documents=None):
+        self._titles = {}       # title -> metadata
+        self._folded = {}       # lowercase title -> [metadata]
+        self._sorted = []       # sorted lowercase titles, for prefix lookups
+        self.trigrams = TrigramIndex()
+
+        for meta in (documents or []):
+            self.add(meta)
+
+    def __len__(self):
+        return len(self._titles)
+
+    def __contains__(self, title):
+        return title.lower() in self._folded
+
+    def add(self, meta):
+        """ Adds a document to the index. """
+        key = meta.name.lower()
+        self._titles[meta.name] = meta
+        if key not in self._folded:
+            self._folded[key] = []
+            insort(self._sorted, key)
+        self._folded[key].append(meta)
+        self.trigrams.add(meta, *search_texts(meta))
+
+    def remove(self, meta):
+        """ Removes a document from the index. """
+        key = meta.name.lower()
+        self._titles.pop(meta.name, None)
+        self.trigrams.remove(meta)
+
+        docs = self._folded.get(key, [])
+        if meta in docs:
+            docs.remove(meta)
+        if not docs and key in self._folded:
+            del self._folded[key]
+            del self._sorted[bisect_left(self._sorted, key)]
+
+    def get(self, title):
+        """ Returns the document with the given title (case-insensitive), or None. """
+        meta = self._titles.get(title)
+        if meta is None:
+            docs = self._folded.get(title.lower())
+            meta = docs[0] if docs else None
+        return meta
+
+    def prefixed(self, prefix):
+        """ Returns all documents whose title starts with the given string (case-insensitive). """
+        prefix = prefix.lower()
+        results = []
+        for i in range(bisect_left(self._sorted, prefix), len(self._sorted)):
+            if not self._sorted[i].startswith(prefix):
+                break
+            results.extend(self._folded[self._sorted[i]])
+        return results
+
+    def similar(self, query, limit=10, min_score=0.3):
+        """ Returns documents with titles similar to the query as TitleMatch objects, best first. """
+        return [TitleMatch(query, meta, MATCH_FUZZY, score)
+                for meta, score in self.trigrams.search(query, limit, min_score)]
+
+    def resolve(self, queries, limit=None, fuzzy=True, cutoff=0.4):
+        """
+            Resolves many title queries at once. Returns a dict of query -> list of TitleMatch, best first.
+                Exact, case-insensitive and prefix matches are found by lookup. Queries without any of those
+                share a single pass over the titles for substring matches, and then fall back to fuzzy matching.
+        """
+        results = {}
+        pending = []
+
+        for query in queries:
+            if query in results:
+                continue
+
+            matches = []
+            folded = query.lower()
+            exact = self._titles.get(query)
+            if exact is not None:
+                matches.append(TitleMatch(query, exact, MATCH_EXACT))
+            for meta in self._folded.get(folded, []):
+                if meta is not exact:
+                    matches.append(TitleMatch(query, meta, MATCH_CASELESS))
+
+            # Shorter titles are closer to the query so they rank first.
+            prefixed = [m for m in self.prefixed(folded) if m.name.lower() != folded]
+            for meta in sorted(prefixed, key=lambda m: len(m.name)):
+                matches.append(TitleMatch(query, meta, MATCH_PREFIX, len(folded) / len(meta.name)))
+
+            results[query] = matches
+            if not matches:
+                pending.append(query)
+
+        # One pass over every title for the queries that still have no matches.
+        if pending:
+            folded = {query: query.lower() for query in pending}
+            for key in self._sorted:
+                for query in pending:
+                    if folded[query] in key:
+                        score = len(folded[query]) / len(key)
+                        results[query].extend(TitleMatch(query, meta, MATCH_CONTAINS, score)
+                                              for meta in self._folded[key])
+
+            for query in pending:
+                results[query].sort(key=lambda m: m.score, reverse=True)
+                if fuzzy and not results[query]:
+                    results[query] = self.similar(query, limit or 10, cutoff)
+
+        if limit:
+            results = {query: matches[:limit] for query, matches in results.items()}
+        return results
+
+
+class KeyIndex:
+    """ Lookup of documents by the value of a field. Documents where the key function returns None are skipped. """
+    def __init__(self, key):
+        self.key = key
+        self._items = {}        # key -> [metadata]
+        self._keys = {}         # metadata -> key
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, meta):
+        key = self.key(meta)
+        if key is not None:
+            self._keys[meta] = key
+            self._items.setdefault(key, []).append(meta)
+
+    def remove(self, meta):
+        key = self._keys.pop(meta, None)
+        if key is not None:
+            docs = self._items[key]
+            docs.remove(meta)
+            if not docs:
+                del self._items[key]
+
+    def get(self, key):
+        """ Returns the documents with the given key. """
+        return list(self._items.get(key, []))
+
+    def keys(self):
+        return list(self._items.keys())
+
+
+class SortedIndex:
+    """ Documents ordered by the value of a field, for range queries. Documents with no value are skipped. """
+    def __init__(self, key):
+        self.key = key
+        self._values = []       # sorted values
+        self._docs = []         # metadata, in the same order as _values
+        self._keys = {}         # metadata -> value
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, meta):
+        value = self.key(meta)
+        if value is not None:
+            i = bisect_right(self._values, value)
+            self._values.insert(i, value)
+            self._docs.insert(i, meta)
+            self._keys[meta] = value
+
+    def remove(self, meta):
+        value = self._keys.pop(meta, None)
+        if value is not None:
+            for i in range(bisect_left(self._values, value), bisect_right(self._values, value)):
+                if self._docs[i] is meta:
+                    del self._values[i]
+                    del self._docs[i]
+                    break
+
+    def range(self, low=None, high=None):
+        """ Returns the documents with low <= value <= high, in ascending order. Either bound can be omitted. """
+        start = 0 if low is None else bisect_left(self._values, low)
+        end = len(self._values) if high is None else bisect_right(self._values, high)
+        return self._docs[start:end]
@@ -1,92 +1,472 @@
 
+from .audit import audit_media
+from .columns import ColumnarCatalog
+from .export import export_records, write_ndjson
+from .index import KeyIndex, SortedIndex, TitleIndex
+from .media_index import MediaIndex
 from .metadata import DocumentMetadata
-from ..preferences import install as pro6_install
+from .prefilter import ContentPrefilter
+from .relocate import relocate_media
+from .replace import TextReplacement, replace_documents
+from .rescale import RESCALE_STRETCH, rescale_documents
+from .text_index import DEFAULT_HIGHLIGHT, TEXT_VARNAMES, TextIndex, element_text
+from .watch import LibraryEvent, LibraryWatcher, scan_documents
+from .watch import EVENT_ADDED, EVENT_UPDATED, EVENT_DELETED
+from ..preferences import get_install
+from ..util.aio import EXECUTOR_PARSE, resolve_executor
+from ..util.general import cached_classproperty
+from ..util.locks import FileLock, ReadWriteLock, read_locked, write_locked
 from ..util.xmlhelp import RV_XML_VARNAME
 
 import base64
-from os import path, listdir
+from os import path
 from os import remove as fs_delete
 import re
+import threading
 import xml.etree.ElementTree as Xml
 
 
-class DocumentLibrary:
-    active = None
+MEDIA_INDEX_FILE = ".pro6utils-media.json"
+
+
+def _ccli_key(meta):
+    number = meta.copyright.number if meta.copyright else None
+    return number.strip() if number and number.strip() else None
+
+
+def _uuid_key(meta):
+    return meta.uuid.upper() if meta.uuid else None
+
+
+def _read_metadata(meta):
+    """
+        Reads a document's metadata into a new DocumentMetadata. Returns the old metadata and the new one, or the
+            exception raised if the file couldn't be read (it may have been removed since the last refresh).
+    """
+    new = DocumentMetadata(meta.path)
+    try:
+        new.update()
+    except (OSError, Xml.ParseError, ValueError) as ex:
+        return meta, ex
+    return meta, new
+
 
+class DocumentLibrary:
+    """
+        An index of the documents in a library folder. Safe to share between threads: lookups hold a read lock
+            and index changes hold the write lock, which is only taken after any files have been read.
+    """
     def __init__(self, library_path, title=None):
         self.path = path.expanduser(path.expandvars(path.normpath(library_path)))
         self.title = title or path.basename(self.path)
         self.documents = {}
+        self.titles = TitleIndex()
+
+        # Secondary indexes, which only contain documents whose metadata has been loaded.
+        self.fields = {
+            "ccli": KeyIndex(_ccli_key),
+            "uuid": KeyIndex(_uuid_key),
+            "category": KeyIndex(lambda meta: meta.category),
+            "last_used": SortedIndex(lambda meta: meta.last_used),
+            "used_count": SortedIndex(lambda meta: meta.used_count)
+        }
+
+        self.metadata_loaded = False    # Set by load_metadata(). Documents found later are read as they appear.
+        self.subscribers = []           # Functions called with a list of LibraryEvent after each refresh()
+        self.errors = {}                # Document file path -> exception raised while reading it, if it can't be read
+        self.lock = ReadWriteLock()     # Held for reading by lookups and for writing by index changes
+        self._refresh_lock = threading.Lock()
+        self._text_index = None
+        self._text_index_lock = threading.Lock()
+
+        self._snapshot = scan_documents(self.path)
+        for file_path in self._snapshot:
+            self._index(DocumentMetadata(file_path))
+
+    @cached_classproperty
+    def active(cls):
+        """ The active library of the local ProPresenter installation, or None. Loaded on first use. """
+        pro6_install = get_install()
+        return cls(pro6_install.get_library(), pro6_install.active_library) if pro6_install else None
+
+    def _index(self, meta):
+        old = self.documents.get(meta.name)
+        if old is not None:
+            self._unindex(old)
+        self.documents[meta.name] = meta
+        self.titles.add(meta)
+        meta.library = self.title
+        if meta.loaded:
+            for index in self.fields.values():
+                index.add(meta)
+
+    def _unindex(self, meta):
+        del self.documents[meta.name]
+        self.titles.remove(meta)
+        for index in self.fields.values():
+            index.remove(meta)
+
+    @read_locked
+    def _files(self, extra_files=None):
+        return [meta.path for meta in self.documents.values()] + list(extra_files or [])
+
+    def load_metadata(self, executor=None):
+        """
+            Reads the metadata of every document, optionally spreading the work over an executor's workers.
+                Each document is read into a new DocumentMetadata, which replaces the old one under the write lock.
+                Documents that can't be read keep their old metadata and are listed in 'errors'.
+        """
+        with self.lock.read():
+            documents = list(self.documents.values())
+
+        if executor:
+            pairs = list(executor.map(_read_metadata, documents))
+        else:
+            pairs = [_read_metadata(meta) for meta in documents]
+        self._index_metadata(pairs, True)
+
+    def _index_metadata(self, pairs, complete):
+        with self.lock.write():
+            for old, meta in pairs:
+                if self.documents.get(old.name) is not old:
+                    continue        # Replaced or removed by a refresh while it was being read.
+                if isinstance(meta, Exception):
+                    self.errors[old.path] = meta
+                    continue
+
+                self.errors.pop(old.path, None)
+                self._unindex(old)
+                self._index(meta)   # Now also searchable by CCLI title and artist
+                if self._text_index is not None:
+                    self._text_index.rebind(meta)
+            self.metadata_loaded = self.metadata_loaded or complete
+
+    async def ascan(self, executor=None):
+        """
+            Reads the metadata of every document without blocking the event loop, yielding each new DocumentMetadata
+                as soon as it has been read. The indexes are updated when the scan finishes or the iterator is closed.
+        """
+        with self.lock.read():
+            documents = list(self.documents.values())
+
+        done = []
+        try:
+            async for old, meta in resolve_executor(executor, EXECUTOR_PARSE).imap(_read_metadata, documents):
+                done.append((old, meta))
+                if not isinstance(meta, Exception):
+                    yield meta
+        finally:
+            self._index_metadata(done, len(done) == len(documents))
+
+    async def aload_metadata(self, executor=None):
+        """ Reads the metadata of every document without blocking the event loop. See ascan(). """
+        async for _ in self.ascan(executor):
+            pass
+
+    @read_locked
+    def columns(self, use_numpy=True):
+        """ Returns a ColumnarCatalog of the documents' metadata, for fast filtering and reporting. """
+        return ColumnarCatalog(self.documents.values(), use_numpy)
+
+    @write_locked
+    def add(self, file_path):
+        """ Adds a document file to the library's index, replacing any document with the same title. """
+        meta = DocumentMetadata(file_path)
+        self._index(meta)
+        if self._text_index is not None:
+            self._text_index.rebind(meta)
+        return meta
+
+    def rescan(self):
+        """ Updates the library's index with documents that have been added, changed or removed on disk. """
+        return self.refresh()
+
+    def refresh(self):
+        """
+            Compares the library folder with the last scan and updates the index for any differences.
+                Only new and modified documents are read. Returns a list of LibraryEvent, which is also
+                passed to each subscriber. Documents that can't be read are listed in 'errors'.
+        """
+        with self._refresh_lock:
+            events = self._refresh()
+
+        if events:
+            for callback in list(self.subscribers):
+                callback(events)
+        return events
+
+    def _refresh(self):
+        snapshot = scan_documents(self.path)
+        with self.lock.read():
+            by_path = {meta.path: meta for meta in self.documents.values()}
 
-        for file in listdir(self.path):
-            parts = path.splitext(file)
-            if parts[1].lower() == ".pro6":
-                meta = DocumentMetadata(path.join(self.path, file))
-                self.documents[meta.name] = meta
+        removed = [by_path[fp] for fp in self._snapshot if fp not in snapshot and fp in by_path]
+        changed = []    # (event kind, old metadata or None, new metadata)
+        failed = {}     # File path -> exception raised while reading it
+        for file_path, stat in snapshot.items():
+            if file_path not in by_path:
+                kind, old = EVENT_ADDED, None
+            elif self._snapshot.get(file_path) != stat:
+                kind, old = EVENT_UPDATED, by_path[file_path]
+            else:
+                continue
 
-    def load_metadata(self):
-        for meta in self.documents.values():
-            meta.update()
+            # Changed documents are read into new metadata objects, so readers never see half-updated metadata.
+            meta = DocumentMetadata(file_path)
+            if self.metadata_loaded or (old is not None and old.loaded):
+                try:
+                    meta.update()
+                except Exception as ex:     # The file could still be in the middle of being written.
+                    failed[file_path] = ex
+                    snapshot[file_path] = None      # Try again on the next refresh.
+            changed.append((kind, old, meta))
 
+        events = []
+        with self.lock.write():
+            for meta in removed:
+                if self.documents.get(meta.name) is meta:
+                    self._unindex(meta)
+                self.errors.pop(meta.path, None)
+                events.append(LibraryEvent(EVENT_DELETED, meta))
+            for kind, old, meta in changed:
+                if old is not None and self.documents.get(old.name) is old:
+                    self._unindex(old)
+                self._index(meta)
+                self.errors.pop(meta.path, None)
+                events.append(LibraryEvent(kind, meta))
+            self.errors.update(failed)
+        self._snapshot = snapshot
+        return events
+
+    def subscribe(self, callback):
+        """ Registers a function to be called with a list of LibraryEvent whenever refresh() finds changes. """
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        self.subscribers.remove(callback)
+
+    def watch(self, interval=2.0):
+        """ Starts refreshing the library in the background. Returns the LibraryWatcher, which can be stopped. """
+        return LibraryWatcher(self, interval).start()
+
+    def audit_media(self, extra_files=None, workers=None):
+        """ Checks that all media referenced by the library's documents (and any extra playlists) exists. """
+        return audit_media(self._files(extra_files), workers)
+
+    def relocate_media(self, mapping, extra_files=None, dry_run=False, workers=None):
+        """ Rewrites media paths in the library's documents (and any extra playlists) from old to new prefixes. """
+        return relocate_media(self._files(extra_files), mapping, dry_run, workers)
+
+    def rescale(self, width, height, mode=RESCALE_STRETCH, dry_run=False, workers=None):
+        """
+            Changes the output size of every document, scaling element positions and media offsets to match.
+                mode is one of RESCALE_STRETCH, RESCALE_FIT (letterbox/pillarbox) or RESCALE_FILL (crop).
+                Returns a dict of file path -> number of values changed.
+        """
+        return rescale_documents(self._files(), width, height, mode, dry_run, workers)
+
+    def export(self, output=None, per_slide=False, ordered=True, workers=None, executor=None):
+        """
+            Writes the text and metadata of every document as newline-delimited JSON, one record per document (or
+                per slide), to a file object or path (default: stdout). Documents are read in parallel with a
+                streaming parser; see export.export_records(). Returns the number of records written.
+        """
+        return write_ndjson(export_records(self._files(), per_slide, self.title, ordered, workers, executor), output)
+
+    def replace_text(self, find, replace, regex=False, ignore_case=False, dry_run=False, workers=None):
+        """
+            Replaces text in the text boxes of every document, keeping their formatting. Only documents that could
+                contain the text are read: they're looked up in the text index if it has been built, and otherwise
+                picked out with a scan of their raw bytes. Returns a dict of file path -> list of TextChange for
+                the documents that changed; see replace.format_changes() for a diff report.
+        """
+        replacement = TextReplacement(find, replace, regex, ignore_case)
+        candidates = None
+        if self._text_index is not None and not regex:
+            self.refresh()      # Bring the index up to date with any changes not yet picked up by watch().
+            candidates = self._text_index.candidates(find)
+
+        with self.lock.read():
+            documents = list(self.documents.values())
+        if candidates is not None:
+            # Compared by path, as the metadata objects may have been replaced since the slides were indexed.
+            paths = {meta.path for meta in candidates}
+            files = [meta.path for meta in documents if meta.path in paths]
+        else:
+            prefilter = ContentPrefilter(replacement.pattern)
+            files = [meta.path for meta in documents if prefilter.could_match(meta.path)]
+
+        results = replace_documents(files, replacement, dry_run, workers)
+        return {file_path: changes for file_path, changes in results.items() if changes}
+
+    @read_locked
+    def get(self, title):
+        """ Returns the metadata of the document with the given title, or None. Case-insensitive. """
+        return self.titles.get(title)
+
+    @read_locked
+    def by_ccli(self, number):
+        """ Returns the documents with the given CCLI song number. Requires loaded metadata. """
+        return self.fields["ccli"].get(str(number).strip())
+
+    @read_locked
+    def by_uuid(self, uuid):
+        """ Returns the document with the given UUID, or None. Case-insensitive. Requires loaded metadata. """
+        docs = self.fields["uuid"].get(uuid.upper())
+        return docs[0] if docs else None
+
+    @read_locked
+    def by_category(self, category):
+        """ Returns the documents in the given category. Requires loaded metadata. """
+        return self.fields["category"].get(category)
+
+    @read_locked
+    def used_between(self, start=None, end=None):
+        """ Returns documents last used between two (timezone-aware) datetimes, inclusive, oldest first. """
+        return self.fields["last_used"].range(start, end)
+
+    @read_locked
+    def used_count_between(self, low=None, high=None):
+        """ Returns documents used between low and high times, inclusive, least used first. """
+        return self.fields["used_count"].range(low, high)
+
+    def media_index(self, extra_files=None, save=True, workers=None):
+        """
+            Returns a MediaIndex of which documents (and extra playlists) use each media file.
+                The index is stored in the library folder and only changed files are re-read when it's updated.
+        """
+        index_path = path.join(self.path, MEDIA_INDEX_FILE)
+        index = MediaIndex.load(index_path)
+        if index.update(self._files(extra_files), workers) and save:
+            index.save(index_path)
+        return index
+
+    def text_index(self, workers=None):
+        """
+            Returns a TextIndex of the words on every slide, reading all documents on first use.
+                It's kept up to date by refresh() (and so by watch()) from then on.
+        """
+        with self._text_index_lock:
+            if self._text_index is None:
+                with self.lock.read():
+                    documents = list(self.documents.values())
+                index = TextIndex()
+                index.add_files(documents, workers)
+                with self.lock.write():
+                    # Catch up with metadata replaced while the documents were being read. From here on it's
+                    #   rebound as it's replaced, so hits always refer to the library's current metadata.
+                    for meta in self.documents.values():
+                        index.rebind(meta)
+                    self._text_index = index
+                self.subscribe(index.on_library_events)
+            return self._text_index
+
+    def search_text(self, query, limit=None, highlight=DEFAULT_HIGHLIGHT):
+        """
+            Finds the slides containing every word of the query, ignoring case. Yields TextHit (document, group,
+                slide UUID, line and a highlighted snippet), most relevant first. Builds the text index on first use.
+        """
+        return self.text_index().search(query, limit, highlight)
+
+    @read_locked
     def exists(self, title):
         """ Checks if a document with the given title is in the library. Case-insensitive. """
-        return title.lower() in [d.lower() for d in self.documents]
+        return title in self.titles
+
+    @read_locked
+    def exists_many(self, titles):
+        """ Checks which of the given titles are in the library. Returns a dict of title -> bool. Case-insensitive. """
+        return {title: title in self.titles for title in titles}
 
     def delete(self, title):
         """ Deletes the document with the specified title. Case-insensitive. """
-        if not self.exists(title):
-            raise Exception("A document with that title could not be found.")
+        self.delete_many([title])
+
+    def delete_many(self, titles):
+        """ Deletes the documents with the given titles. Case-insensitive. Nothing is deleted if any are missing. """
+        titles = list(titles)
+        # A refresh in progress would add the deleted documents back, as it may have scanned the folder already.
+        with self._refresh_lock, self.lock.write():
+            documents = [self.titles.get(title) for title in titles]
+            if None in documents:
+                raise Exception("A document with the title '%s' could not be found." % titles[documents.index(None)])
+
+            for meta in documents:
+                if self.documents.get(meta.name) is meta:   # The same document could be listed more than once.
+                    with FileLock(meta.path):
+                        fs_delete(meta.path)
+                    self._unindex(meta)
+                    self._snapshot.pop(meta.path, None)
+                    if self._text_index is not None:
+                        self._text_index.remove(meta)
 
-        # Find the proper case of the title.
-        title = {t.lower(): t for t in self.documents}.get(title.lower())
+    @read_locked
+    def resolve(self, queries, limit=None, fuzzy=True):
+        """
+            Finds documents for many titles at once. Returns a dict of query -> list of TitleMatch, best first.
+                Matches are ranked exact, case-insensitive, prefix, contains and then fuzzy (if enabled).
+        """
+        return self.titles.resolve(queries, limit, fuzzy)
 
-        # Remove the file
-        del self.documents[title]
-        fs_delete(path.join(self.path, title + ".pro6"))
+    @read_locked
+    def fuzzy_search(self, query, limit=10, min_score=0.3):
+        """
+            Finds documents with titles similar to the query, tolerating typos and extra words. Returns a list of
+                TitleMatch, best first. Once metadata is loaded the CCLI song title and artist are also searched.
+        """
+        return self.titles.similar(query, limit, min_score)
 
     def search(self, s, include_content=False, flags=re.IGNORECASE):
         """ Searches document titles and optionally content for given string. Supports regex. """
 
         results = []
         query = re.compile(s, flags)
+        with self.lock.read():
+            documents = list(self.documents.items())
 
         # Search titles first (quick)
-        for title, doc in self.documents.items():
+        for title, doc in documents:
             if query.search(title):
                 results.append(doc)
 
         # Optionally search "plain text" content, if available (slow)
         if include_content:
+            matched = set(id(doc) for doc in results)
+            prefilter = ContentPrefilter(query)
+
             # Only search documents that haven't already matched by title
-            for title, doc in self.documents.items():
-                if doc in results:
+            for title, doc in documents:
+                if id(doc) in matched:
+                    continue
+
+                # Skip parsing documents whose raw bytes can't contain a match.
+                if not prefilter.could_match(doc.path):
                     continue
 
                 # Directly read the XML for this to hopefully improve performance.
-                tree = Xml.parse(path.join(self.path, title + ".pro6"))
+                tree = Xml.parse(doc.path)
 
                 found_match = False
                 # Search each slide
-                for slide in tree.findall("RVDisplaySlide"):
+                for slide in tree.iterfind(".//RVDisplaySlide"):
                     # Check slide notes
                     notes = slide.get("notes")
                     if notes and query.search(notes):
                         found_match = True
-                        break
                     else:
-                        # Check 'PlainText' of slides (may not cover all the text)
-                        subs = slide.findall("NSString[@" + RV_XML_VARNAME + "='PlainText']")
-                        for encoded_text in [sub.text for sub in subs]:
-                            text = base64.b64decode(encoded_text).decode()  # Base64 -> Bytes -> String
-                            if query.search(text):
+                        # Check the 'PlainText' of text elements, or their RTF if they have no plain text
+                        for element in slide.iter("RVTextElement"):
+                            strings = {}
+                            for sub in element.iterfind("NSString"):
+                                if sub.get(RV_XML_VARNAME) in TEXT_VARNAMES and sub.text:
+                                    strings[sub.get(RV_XML_VARNAME)] = base64.b64decode(sub.text).decode()
+                            if query.search(element_text(strings.get("PlainText"), strings.get("RTFData"))):
                                 found_match = True
                                 break
+                    if found_match:
+                        break
 
                 if found_match:
                     results.append(doc)
 
         return results
-
-
-if pro6_install:
-    DocumentLibrary.active = DocumentLibrary(pro6_install.get_library(), pro6_install.active_library)
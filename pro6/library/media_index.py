@@ -0,0 +1,122 @@
+from .stream import MediaReference, iter_media
+from ..util.general import normalize_path
+from ..util.locks import FileLock, write_atomic
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import xml.etree.ElementTree as Xml
+
+
+MEDIA_INDEX_VERSION = 1
+
+
+def _stat(file_path):
+    try:
+        st = os.stat(file_path)
+        return [st.st_mtime, st.st_size]
+    except OSError:
+        return None
+
+
+def _read(file_path):
+    try:
+        return list(iter_media(file_path))
+    except (OSError, Xml.ParseError, ValueError) as ex:
+        return ex
+
+
+class MediaIndex:
+    """
+        Reverse index of media files to the documents and playlists that use them.
+            Files are only re-read when their modification time or size has changed since they were last indexed.
+    """
+    def __init__(self):
+        self._files = {}        # document/playlist path -> {"stat": [mtime, size], "refs": [MediaReference]}
+        self._uses = {}         # normalized media path -> [MediaReference]
+        self.errors = {}        # document/playlist path -> exception raised while reading it in the last update()
+
+    def __len__(self):
+        return len(self._uses)
+
+    def __contains__(self, media_path):
+        return normalize_path(media_path) in self._uses
+
+    def _add_file(self, file_path, stat, refs):
+        self._files[file_path] = {"stat": stat, "refs": refs}
+        for ref in refs:
+            self._uses.setdefault(normalize_path(ref.path), []).append(ref)
+
+    def _remove_file(self, file_path):
+        for ref in self._files.pop(file_path)["refs"]:
+            key = normalize_path(ref.path)
+            refs = self._uses[key]
+            refs.remove(ref)
+            if not refs:
+                del self._uses[key]
+
+    def update(self, files, workers=None):
+        """
+            Brings the index up to date with the given documents and playlists. Files that are not in the list are
+                dropped from the index, as are files that can't be read: they're listed in 'errors' and read again
+                on the next update. Returns the number of files that were (re-)read.
+        """
+        files = list(files)
+        self.errors = {}
+        with ThreadPoolExecutor(workers) as pool:
+            stats = dict(zip(files, pool.map(_stat, files)))
+
+            for file_path in [fp for fp in self._files if stats.get(fp) is None]:
+                self._remove_file(file_path)
+
+            changed = [fp for fp, st in stats.items()
+                       if st is not None and (fp not in self._files or self._files[fp]["stat"] != st)]
+            count = 0
+            for file_path, refs in zip(changed, pool.map(_read, changed)):
+                if file_path in self._files:
+                    self._remove_file(file_path)
+                if isinstance(refs, Exception):
+                    self.errors[file_path] = refs
+                else:
+                    self._add_file(file_path, stats[file_path], refs)
+                    count += 1
+        return count
+
+    def users(self, media_path):
+        """ Returns every reference to a media file, as MediaReference objects. """
+        return list(self._uses.get(normalize_path(media_path), []))
+
+    def documents(self, media_path):
+        """ Returns the paths of the documents and playlists that use a media file. """
+        return sorted({ref.document for ref in self._uses.get(normalize_path(media_path), [])})
+
+    def media(self):
+        """ Returns every media path in the index. """
+        return [refs[0].path for refs in self._uses.values()]
+
+    def save(self, file_path):
+        """ Writes the index to a JSON file. """
+        data = {
+            "version": MEDIA_INDEX_VERSION,
+            "files": {fp: {"stat": entry["stat"],
+                           "refs": [[r.path, r.kind, r.slide, r.playlist] for r in entry["refs"]]}
+                      for fp, entry in self._files.items()}
+        }
+
+        with FileLock(file_path):
+            write_atomic(file_path, json.dumps(data).encode("utf-8"))
+
+    @classmethod
+    def load(cls, file_path):
+        """ Reads an index from a JSON file. Missing or outdated files result in an empty index. """
+        index = cls()
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+
+        if data.get("version") == MEDIA_INDEX_VERSION:
+            for fp, entry in data["files"].items():
+                index._add_file(fp, entry["stat"], [MediaReference(fp, *ref) for ref in entry["refs"]])
+        return index
@@ -2,6 +2,7 @@
 from ..util.general import parse_date, unprepare_path
 from ..util.xmlhelp import RV_XML_VARNAME
 
+from datetime import datetime
 from os import path
 import xml.etree.ElementTree as Xml
 
@@ -23,6 +24,7 @@ class DocumentMetadata:
     def __init__(self, doc_path):
         self.path = doc_path
         self.name = path.basename(path.splitext(doc_path)[0])
+        self.library = None         # Title of the library containing the document
         self.category = None
         self.last_used = None
         self.height = 0
@@ -32,11 +34,10 @@ class DocumentMetadata:
         self.uuid = None
         self.copyright = None
         self.media = []
+        self.loaded = False         # True once update() has read the file
 
-    def update(self):
-        """ Reads metadata from the document file. """
-        root = Xml.parse(self.path).getroot()
-
+    def read_attributes(self, root):
+        """ Reads the metadata held in the attributes of a document's root element. """
         self.category = root.get("category", self.category)
         self.last_used = parse_date(root.get("lastDateUsed", self.last_used))
         self.height = int(root.get("height", self.height))
@@ -45,6 +46,11 @@ class DocumentMetadata:
         self.uuid = root.get("uuid", self.uuid)
         self.copyright = CCLI(root)
 
+    def update(self):
+        """ Reads metadata from the document file. """
+        root = Xml.parse(self.path).getroot()
+        self.read_attributes(root)
+
         slides = root.findall(".//RVDisplaySlide")
         self.slide_count = len(slides)
 
@@ -55,3 +61,31 @@ class DocumentMetadata:
                 source = list(background)[0].get("source")
                 if source:
                     self.media.append(unprepare_path(source))
+        self.loaded = True
+
+
+def metadata_to_dict(meta):
+    """ Converts DocumentMetadata to a JSON-compatible dict. """
+    ccli = meta.copyright
+    return {
+        "name": meta.name,
+        "path": meta.path,
+        "library": meta.library,
+        "loaded": meta.loaded,
+        "category": meta.category,
+        "last_used": meta.last_used.isoformat() if isinstance(meta.last_used, datetime) else None,
+        "used_count": meta.used_count,
+        "slide_count": meta.slide_count,
+        "width": meta.width,
+        "height": meta.height,
+        "uuid": meta.uuid,
+        "ccli": {
+            "number": ccli.number,
+            "title": ccli.title,
+            "artist": ccli.artist,
+            "author": ccli.author,
+            "publisher": ccli.publisher,
+            "year": ccli.year
+        } if ccli else None,
+        "media": meta.media
+    }
@@ -0,0 +1,171 @@
+from ..util.rtf import rtf_to_text
+
+import base64
+import mmap
+import re
+
+
+# Slide notes and base64 'PlainText' strings, as they appear in the raw bytes of a document.
+_NOTES = re.compile(rb"""\snotes=(?:"([^"]*)"|'([^']*)')""")
+_PLAIN_TEXT = re.compile(rb"""PlainText["'][^>]*>([^<]*)<""")
+_EMPTY_PLAIN_TEXT = re.compile(rb"""PlainText["'][^>]*(?:/>|>\s*<)""")
+_RTF_DATA = re.compile(rb"""RTFData["'][^>]*>([^<]*)<""")
+_ENTITY = re.compile(r"&(#[xX][0-9a-fA-F]+|#[0-9]+|amp|lt|gt|quot|apos);")
+_NAMED_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+
+_REGEX_SPECIAL = ".^$*+?{}[]|()"
+_XML_SPECIAL = "&<>\"'"
+
+# Non-ASCII characters that case-insensitive str patterns match for ASCII letters, as UTF-8.
+_UNICODE_FOLDS = {
+    "i": [b"\xc4\xb0", b"\xc4\xb1"],
+    "k": [b"\xe2\x84\xaa"],
+    "s": [b"\xc5\xbf"]
+}
+
+
+def _entity(match):
+    name = match.group(1)
+    if name[0] != "#":
+        return _NAMED_ENTITIES[name]
+    return chr(int(name[2:], 16) if name[1] in "xX" else int(name[1:]))
+
+
+def attribute_text(raw):
+    """ Returns the value of an XML attribute as a parser would, from its raw bytes. """
+    text = raw.decode("utf-8", "replace").replace("\r\n", "\n").replace("\r", "\n")
+    text = text.replace("\t", " ").replace("\n", " ")
+    return _ENTITY.sub(_entity, text) if "&" in text else text
+
+
+def literal_text(query):
+    """ Returns the text matched by a compiled str pattern if it has no special characters, otherwise None. """
+    if not isinstance(query.pattern, str) or query.flags & re.VERBOSE:
+        return None
+
+    chars = []
+    escaped = False
+    for c in query.pattern:
+        if escaped:
+            if c.isalnum():
+                return None         # A character class or other special sequence like \d or \b
+            chars.append(c)
+            escaped = False
+        elif c == "\\":
+            escaped = True
+        elif c in _REGEX_SPECIAL:
+            return None
+        else:
+            chars.append(c)
+    return None if escaped else "".join(chars)
+
+
+def _raw_pattern(text, ignore_case):
+    """ Returns a bytes pattern finding the text as it would be written in an attribute, or None if it can't. """
+    if any(c in _XML_SPECIAL or (c.isspace() and c != " ") or ord(c) > 127 for c in text):
+        return None
+
+    parts = []
+    for c in text:
+        if c == " ":
+            parts.append(rb"\s")        # Attribute whitespace is normalized to spaces when parsed.
+        elif ignore_case and c.lower() in _UNICODE_FOLDS:
+            folds = [re.escape(c.lower().encode()), re.escape(c.upper().encode())]
+            parts.append(b"(?:" + b"|".join(folds + _UNICODE_FOLDS[c.lower()]) + b")")
+        else:
+            parts.append(re.escape(c.encode()))
+    return re.compile(b"".join(parts), re.IGNORECASE if ignore_case else 0)
+
+
+def _base64_patterns(text):
+    """
+        Returns bytes patterns finding UTF-8 text inside base64, one for each of the three possible alignments of
+            the text within the encoded data, or None if the text is too short for every alignment to be found.
+    """
+    data = text.encode("utf-8")
+    patterns = []
+    for offset in range(3):
+        encoded = base64.b64encode(b"\0" * offset + data)
+        # Only the characters encoding nothing but the text itself are the same wherever it appears.
+        start = -(-offset * 8 // 6)
+        end = (offset + len(data)) * 8 // 6
+        if end <= start:
+            return None
+        chars = [re.escape(encoded[i:i + 1]) for i in range(start, end)]
+        patterns.append(re.compile(rb"\s*".join(chars)))
+    return patterns
+
+
+class ContentPrefilter:
+    """
+        Rules out documents that can't match a content search by scanning their raw bytes, without parsing XML.
+            could_match() never returns False for a document that DocumentLibrary.search() would match.
+            Simple (literal) queries are found with a byte scan, including inside the base64 'PlainText' of slides
+            when the search is case-sensitive. Otherwise the notes and plain text are picked out of the raw bytes
+            and searched with the query itself. Documents with text elements lacking plain text also have their RTF
+            converted and searched.
+    """
+    def __init__(self, query):
+        self.query = query
+        text = literal_text(query)
+        ignore_case = bool(query.flags & re.IGNORECASE)
+        self._raw = _raw_pattern(text, ignore_case) if text is not None else None
+        self._base64 = _base64_patterns(text) if text and not ignore_case else None
+
+    def could_match(self, file_path):
+        """ Returns False if the document's slide notes and plain text can't contain a match for the query. """
+        with open(file_path, "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:      # Empty file
+                return True
+            with data:
+                return self._scan(data)
+
+    def _scan(self, data):
+        if data[:2] in [b"\xff\xfe", b"\xfe\xff"]:
+            return True             # UTF-16 can't be scanned as bytes.
+
+        # Numeric character references could spell out any part of the notes, so they need to be decoded.
+        if self._raw is not None and data.find(b"&#") == -1:
+            if self._raw.search(data):
+                return True
+        elif self._search_notes(data):
+            return True
+
+        if self._base64 is not None:
+            if any(pattern.search(data) for pattern in self._base64):
+                return True
+        elif self._search_plain_text(data):
+            return True
+
+        # Text elements without plain text are searched by the text of their RTF.
+        if _EMPTY_PLAIN_TEXT.search(data) or len(_RTF_DATA.findall(data)) > len(_PLAIN_TEXT.findall(data)):
+            return self._search_rtf(data)
+        return False
+
+    def _search_notes(self, data):
+        for match in _NOTES.finditer(data):
+            if self.query.search(attribute_text(match.group(1) or match.group(2) or b"")):
+                return True
+        return False
+
+    def _search_plain_text(self, data):
+        for match in _PLAIN_TEXT.finditer(data):
+            try:
+                text = base64.b64decode(match.group(1)).decode()
+            except ValueError:
+                return True         # Let the XML search decide what to do with it.
+            if self.query.search(text):
+                return True
+        return False
+
+    def _search_rtf(self, data):
+        for match in _RTF_DATA.finditer(data):
+            try:
+                text = rtf_to_text(base64.b64decode(match.group(1)).decode())
+            except ValueError:
+                return True
+            if self.query.search(text):
+                return True
+        return False
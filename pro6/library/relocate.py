@@ -0,0 +1,118 @@
+from ..util.compat import *
+from ..util.general import normalize_path, prepare_path, unprepare_path
+from ..util.locks import FileLock, write_atomic
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+
+
+# Attributes holding media and document paths, in any of the formats ProPresenter writes.
+PATH_ATTRIBUTE = re.compile(r'(\s(?:source|filePath)=")([^"]*)(")')
+
+_WIN_PATH = re.compile(r"^(?:[a-zA-Z]:[\\/]|\\\\)")
+_DRIVE = re.compile(r"[a-zA-Z]:")
+_XML_ENTITIES = [("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ('"', "&quot;")]
+
+
+def _is_windows_path(s):
+    return _WIN_PATH.match(s) is not None
+
+
+def _escape(s):
+    for char, entity in _XML_ENTITIES:
+        s = s.replace(char, entity)
+    return s
+
+
+def _unescape(s):
+    if "&" in s:
+        for char, entity in reversed(_XML_ENTITIES + [("'", "&apos;")]):
+            s = s.replace(entity, char)
+    return s
+
+
+def _strip_separators(prefix):
+    """ Removes trailing separators from a path prefix, unless it's a bare root such as / or C:\\. """
+    stripped = prefix.rstrip("\\/")
+    return stripped if stripped and not _DRIVE.fullmatch(stripped) else prefix
+
+
+class RelocationRule:
+    def __init__(self, old_prefix, new_prefix):
+        self.old = _strip_separators(os.path.expanduser(os.path.expandvars(old_prefix)))
+        self.new = _strip_separators(new_prefix)
+        self._match = normalize_path(self.old)
+        self._sep = "\\" if _is_windows_path(new_prefix) else "/"
+
+    def apply(self, file_path):
+        """ Returns the relocated path, or None if the path is not under this rule's prefix. """
+        if normalize_path(file_path[:len(self.old)]) != self._match:
+            return None
+
+        remainder = file_path[len(self.old):]
+        if remainder and remainder[0] not in "\\/" and self.old[-1:] not in "\\/":
+            return None     # Prefix only matched part of a directory name. A bare root matches anything below it.
+
+        parts = [p for p in re.split(r"[\\/]", remainder) if p]
+        return self._sep.join([self.new.rstrip("\\/")] + parts)
+
+
+def _encode_like(original, new_path):
+    """ Encodes a path in the same format (mac URL, windows URL or plain) as the original attribute value. """
+    if original.startswith("file:"):
+        return prepare_path(new_path, OS_MACOSX)
+    elif "%" in original or _is_windows_path(original):
+        return prepare_path(new_path, OS_WINDOWS)
+    else:
+        return new_path
+
+
+def relocate_text(text, rules):
+    """ Rewrites the path attributes in an XML string. Returns the new string and the number of changes. """
+    changes = 0
+
+    def replace(match):
+        nonlocal changes
+        raw = _unescape(match.group(2))
+        if not raw:
+            return match.group(0)
+
+        current = unprepare_path(raw)
+        for rule in rules:
+            relocated = rule.apply(current)
+            if relocated is not None:
+                changes += 1
+                return match.group(1) + _escape(_encode_like(raw, relocated)) + match.group(3)
+        return match.group(0)
+
+    return PATH_ATTRIBUTE.sub(replace, text), changes
+
+
+def relocate_file(file_path, rules, dry_run=False):
+    """ Rewrites the media and document paths in a single file. Returns the number of changed references. """
+    with FileLock(file_path):
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        # Decoding as plain UTF-8 keeps any byte order mark so the file is otherwise left byte-for-byte identical.
+        text, changes = relocate_text(data.decode("utf-8"), rules)
+        if changes and not dry_run:
+            write_atomic(file_path, text.encode("utf-8"), ".relocate-")
+    return changes
+
+
+def relocate_media(files, mapping, dry_run=False, workers=None):
+    """
+        Moves media and document references from one location to another across many documents and playlists.
+            mapping is a dict (or list of pairs) of old path prefix -> new path prefix. Longer prefixes take priority.
+            Only the affected attributes are rewritten; the rest of each file is untouched.
+            Returns a dict of file path -> number of references changed.
+    """
+    pairs = mapping.items() if isinstance(mapping, dict) else mapping
+    rules = sorted((RelocationRule(old, new) for old, new in pairs), key=lambda r: len(r.old), reverse=True)
+
+    files = list(files)
+    with ThreadPoolExecutor(workers) as pool:
+        counts = pool.map(lambda fp: relocate_file(fp, rules, dry_run), files)
+        return dict(zip(files, counts))
@@ -0,0 +1,204 @@
+from .text_index import element_text
+from ..util.locks import FileLock, write_atomic
+from ..util.rtf import escape_rtf, iter_rtf_pieces
+
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import difflib
+import re
+
+
+_TEXT_ELEMENT = re.compile(r"<RVTextElement\b.*?</RVTextElement>", re.DOTALL)
+_TEXT_STRING = re.compile(
+    r'(<NSString\b[^>]*\brvXMLIvarName="(PlainText|RTFData|WinFlowData)"[^>]*>)([^<]*)(</NSString>)')
+_SLIDE = re.compile(r'<RVDisplaySlide\b[^>]*\bUUID="([^"]*)"')
+
+# Tokens of WinFlowData (XAML): tags, entities and text.
+_FLOW_TOKEN = re.compile(r"(<[^>]*>)|&(#[xX][0-9a-fA-F]+|#[0-9]+|amp|lt|gt|quot|apos);|([^<&]+)")
+_FLOW_BREAK = re.compile(r"</Paragraph>|<LineBreak\b")
+_FLOW_ENTITIES = {"amp": "&", "lt": "<", "gt": ">", "quot": '"', "apos": "'"}
+
+# An RTF control word that would run into text placed straight after it.
+_OPEN_CONTROL_WORD = re.compile(r"(?<!\\)(?:\\\\)*\\[a-zA-Z]+-?\d*$")
+
+
+class TextReplacement:
+    """ What to find in slide text and what to replace it with. Without 'regex' both are taken literally. """
+    def __init__(self, find, replace, regex=False, ignore_case=False):
+        self.find = find
+        self.replace = replace
+        self.regex = regex
+        self.pattern = re.compile(find if regex else re.escape(find), re.IGNORECASE if ignore_case else 0)
+
+    def expand(self, match):
+        """ Returns the replacement for a match. """
+        return match.expand(self.replace) if self.regex else self.replace
+
+    def sub(self, text):
+        """ Returns the text with every match replaced, and the number of matches. """
+        return self.pattern.subn(self.expand, text)
+
+
+class TextChange:
+    def __init__(self, file_path, slide, before, after, count):
+        self.file_path = file_path
+        self.slide = slide              # UUID of the slide containing the text box
+        self.before = before            # Text of the text box before and after the replacement
+        self.after = after
+        self.count = count              # Number of matches replaced
+
+    def diff(self):
+        """ Returns the change as a unified diff of the text box's lines. """
+        name = "%s (slide %s)" % (self.file_path, self.slide)
+        return "\n".join(difflib.unified_diff(self.before.splitlines(), self.after.splitlines(), name, name,
+                                             n=1, lineterm=""))
+
+    def __repr__(self):
+        return "<TextChange %s: %r -> %r>" % (self.slide, self.before, self.after)
+
+
+def _patch(source, pieces, replacement, escape, rtf=False):
+    """
+        Replaces matches in the text of a formatted string, given its text as (text, start, end, literal) pieces.
+            Each match is replaced by the escaped replacement followed by whatever formatting was between its
+            characters, so tags and groups stay balanced. For RTF, spaces are added where needed to end control
+            words. Returns the new string.
+    """
+    text = []
+    starts, ends = [], []       # Span of the source each character of the text came from
+    for piece, start, end, literal in pieces:
+        text.append(piece)
+        if literal:
+            starts.extend(range(start, end))
+            ends.extend(range(start + 1, end + 1))
+        else:
+            starts.extend([start] * len(piece))
+            ends.extend([end] * len(piece))
+    text = "".join(text)
+
+    result = []
+    position = 0
+    for m in replacement.pattern.finditer(text):
+        if m.start() == m.end():
+            continue
+        start, end = starts[m.start()], ends[m.end() - 1]
+        if start < position:
+            continue        # Overlaps the previous match's source, as several characters can share one escape.
+
+        # Keep the formatting between the matched characters.
+        kept = []
+        last = start
+        for i in range(m.start(), m.end()):
+            if starts[i] > last:
+                kept.append(source[last:starts[i]])
+            last = max(last, ends[i])
+        kept = "".join(kept)
+
+        new = escape(replacement.expand(m))
+        if rtf and kept and _OPEN_CONTROL_WORD.search(kept):
+            kept += " "
+        if rtf and _OPEN_CONTROL_WORD.search(source, max(0, start - 32), start):
+            new = " " + new
+        result.append(source[position:start] + new + kept)
+        position = end
+    result.append(source[position:])
+    return "".join(result)
+
+
+def _flow_pieces(flow):
+    for m in _FLOW_TOKEN.finditer(flow):
+        tag, entity, text = m.groups()
+        if text is not None:
+            yield text, m.start(), m.end(), True
+        elif entity is not None:
+            name = entity
+            value = _FLOW_ENTITIES[name] if name[0] != "#" else \
+                chr(int(name[2:], 16) if name[1] in "xX" else int(name[1:]))
+            yield value, m.start(), m.end(), False
+        elif _FLOW_BREAK.match(tag):
+            yield "\n", m.start(), m.start(), False     # Matched line breaks are kept, as they're tags.
+
+
+def _escape_flow(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\n", "&#xA;")
+
+
+def _replace_element(strings, replacement):
+    """
+        Applies a replacement to the decoded strings of one text element, a dict of var name -> value.
+            The plain text is replaced and the RTF and flow data are patched, so their formatting is kept.
+            Returns a dict of the strings that changed, the text before and after, and the number of matches.
+    """
+    plain = strings.get("PlainText")
+    before = element_text(plain, strings.get("RTFData"))
+    after, count = replacement.sub(before)
+    if not count:
+        return {}, before, after, 0
+
+    changed = {"PlainText": after} if plain else {}
+    rtf, flow = strings.get("RTFData"), strings.get("WinFlowData")
+    if rtf:
+        changed["RTFData"] = _patch(rtf, iter_rtf_pieces(rtf), replacement, escape_rtf, True)
+    if flow:
+        changed["WinFlowData"] = _patch(flow, _flow_pieces(flow), replacement, _escape_flow)
+    return changed, before, after, count
+
+
+def replace_text(text, replacement, file_path=None):
+    """
+        Applies a replacement to the text boxes in the XML of a presentation document, without parsing it into
+            objects. Only the strings of changed text boxes are encoded again. Returns the new text and a list of
+            TextChange.
+    """
+    slides = [(m.start(), m.group(1)) for m in _SLIDE.finditer(text)]
+    starts = [start for start, _ in slides]
+    changes = []
+
+    def encode(match, changed):
+        if match.group(2) not in changed:
+            return match.group(0)
+        return match.group(1) + base64.b64encode(changed[match.group(2)].encode("utf-8")).decode("ascii") + \
+            match.group(4)
+
+    def element(match):
+        block = match.group(0)
+        strings = {m.group(2): base64.b64decode(m.group(3)).decode("utf-8")
+                   for m in _TEXT_STRING.finditer(block) if m.group(3).strip()}
+        changed, before, after, count = _replace_element(strings, replacement)
+        if not changed:
+            return block
+
+        i = bisect_right(starts, match.start()) - 1
+        changes.append(TextChange(file_path, slides[i][1] if i >= 0 else None, before, after, count))
+        return _TEXT_STRING.sub(lambda m: encode(m, changed), block)
+
+    return _TEXT_ELEMENT.sub(element, text), changes
+
+
+def replace_file(file_path, replacement, dry_run=False):
+    """ Applies a replacement to the text boxes of a single presentation document. Returns a list of TextChange. """
+    with FileLock(file_path):
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        text, changes = replace_text(data.decode("utf-8"), replacement, file_path)
+        if changes and not dry_run:
+            write_atomic(file_path, text.encode("utf-8"), ".replace-")
+    return changes
+
+
+def replace_documents(files, replacement, dry_run=False, workers=None):
+    """
+        Applies a replacement to the text boxes of many presentation documents in parallel.
+            Returns a dict of file path -> list of TextChange.
+    """
+    files = list(files)
+    with ThreadPoolExecutor(workers) as pool:
+        changes = pool.map(lambda fp: replace_file(fp, replacement, dry_run), files)
+        return dict(zip(files, changes))
+
+
+def format_changes(results):
+    """ Returns a diff report of the results of replace_documents(). """
+    return "\n".join(change.diff() for file_path in sorted(results) for change in results[file_path])
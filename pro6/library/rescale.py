@@ -0,0 +1,154 @@
+from .columns import _numpy
+from ..util.locks import FileLock, write_atomic
+from ..util.xmlhelp import PointXY, to_nums
+
+from concurrent.futures import ThreadPoolExecutor
+import re
+
+
+# How content is placed when the aspect ratio changes.
+RESCALE_STRETCH = "stretch"     # Scale each axis separately to fill the new size.
+RESCALE_FIT = "fit"             # Keep proportions and center the content, leaving bars (letterbox/pillarbox).
+RESCALE_FILL = "fill"           # Keep proportions and center the content, cropping whatever doesn't fit.
+RESCALE_MODES = [RESCALE_STRETCH, RESCALE_FIT, RESCALE_FILL]
+
+_ROOT_TAG = re.compile(r"<RVPresentationDocument\b[^>]*>")
+_ROOT_SIZE = re.compile(r'(\s(width|height)=")([^"]*)(")')
+_RECT = re.compile(r'(<RVRect3D\b[^>]*\brvXMLIvarName="position"[^>]*>)\{([^}]*)\}(</RVRect3D>)')
+# Media offsets are in output pixels. scaleSize is a zoom factor relative to the element, so it's left alone.
+_OFFSET_ATTRIBUTE = re.compile(r'(\simageOffset=")\{([^}"]*)\}(")')
+
+
+class Rescale:
+    """
+        The transform from one output resolution to another: new = old * scale + offset, for each axis.
+            Rectangles are given as rows of (x, y, rotation, width, height) as in Rect3D. Rectangles of zero size,
+            which ProPresenter uses to mean 'the whole slide', are left alone.
+    """
+    def __init__(self, old_size, new_size, mode=RESCALE_STRETCH, use_numpy=True):
+        if mode not in RESCALE_MODES:
+            raise ValueError("Unrecognized rescale mode: %s" % mode)
+
+        (old_width, old_height), (new_width, new_height) = old_size, new_size
+        sx, sy = new_width / old_width, new_height / old_height
+        if mode != RESCALE_STRETCH:
+            sx = sy = min(sx, sy) if mode == RESCALE_FIT else max(sx, sy)
+
+        self.old_size = (old_width, old_height)
+        self.new_size = (new_width, new_height)
+        self.scale = (sx, sy)
+        self.offset = ((new_width - old_width * sx) / 2, (new_height - old_height * sy) / 2)
+        self.np = _numpy() if use_numpy else None
+
+    @property
+    def is_identity(self):
+        return self.scale == (1, 1) and self.offset == (0, 0)
+
+    def rects(self, rows):
+        """ Transforms a list of (x, y, rotation, width, height) rows. Returns a list of transformed rows. """
+        (sx, sy), (ox, oy) = self.scale, self.offset
+        if not rows:
+            return []
+
+        if self.np:
+            np = self.np
+            data = np.array(rows, dtype=float)
+            factors = np.array([sx, sy, 1.0, sx, sy])
+            offsets = np.array([ox, oy, 0.0, 0.0, 0.0])
+            moved = (data[:, 3] != 0) | (data[:, 4] != 0)
+            data[moved] = data[moved] * factors + offsets
+            return data.tolist()
+
+        return [[x * sx + ox, y * sy + oy, r, w * sx, h * sy] if w or h else [x, y, r, w, h]
+                for x, y, r, w, h in rows]
+
+    def offsets(self, rows):
+        """ Scales a list of (x, y) offsets, without moving them. Returns a list of transformed rows. """
+        sx, sy = self.scale
+        if not rows:
+            return []
+
+        if self.np:
+            return (self.np.array(rows, dtype=float) * self.np.array([sx, sy])).tolist()
+        return [[x * sx, y * sy] for x, y in rows]
+
+
+def rescale_document(document, width, height, mode=RESCALE_STRETCH, use_numpy=True):
+    """
+        Rescales a loaded PresentationDocument to a new output size. Every element position and media offset is
+            gathered and transformed at once. Returns the number of values changed.
+    """
+    transform = Rescale((document.width, document.height), (width, height), mode, use_numpy)
+    document.width, document.height = width, height
+    if transform.is_identity:
+        return 0
+
+    elements = []
+    for slide in document.slides():
+        elements.extend(slide.elements)
+        if slide.background is not None and hasattr(slide.background.element, "position"):
+            elements.append(slide.background.element)
+
+    positioned = [e for e in elements if e.position is not None]
+    rects = transform.rects([[e.position.x, e.position.y, e.position.rotation, e.position.width, e.position.height]
+                             for e in positioned])
+    for e, (x, y, rotation, w, h) in zip(positioned, rects):
+        e.position.x, e.position.y, e.position.rotation, e.position.width, e.position.height = x, y, rotation, w, h
+
+    media = [e for e in elements if hasattr(e, "scaling_size")]
+    offsets = transform.offsets([[e.offset.x, e.offset.y] for e in media])
+    for e, (x, y) in zip(media, offsets):
+        e.offset = PointXY(x, y)
+    return len(positioned) + len(media)
+
+
+def rescale_text(text, width, height, mode=RESCALE_STRETCH, use_numpy=True):
+    """
+        Rescales the XML of a presentation document without parsing it into objects, so anything this library
+            doesn't model is left as it was. Returns the new text and the number of values changed.
+    """
+    root = _ROOT_TAG.search(text)
+    if root is None:
+        raise ValueError("The text is not a ProPresenter 6 presentation document.")
+    size = {m.group(2): float(m.group(3)) for m in _ROOT_SIZE.finditer(root.group(0))}
+    transform = Rescale((size["width"], size["height"]), (width, height), mode, use_numpy)
+
+    new_size = {"width": to_nums(width), "height": to_nums(height)}
+    new_root = _ROOT_SIZE.sub(lambda m: m.group(1) + new_size[m.group(2)] + m.group(4), root.group(0))
+    text = text[:root.start()] + new_root + text[root.end():]
+    if transform.is_identity:
+        return text, 0
+
+    # Gather the geometry, transform it all at once, and put it back in the same order.
+    rects = [[float(v) for v in m.group(2).split()] for m in _RECT.finditer(text)]
+    points = [[float(v) for v in m.group(2).split(",")] for m in _OFFSET_ATTRIBUTE.finditer(text)]
+    new_rects = iter(transform.rects(rects))
+    new_points = iter(transform.offsets(points))
+
+    text = _RECT.sub(lambda m: m.group(1) + "{" + " ".join(to_nums(v) for v in next(new_rects)) + "}" + m.group(3),
+                     text)
+    text = _OFFSET_ATTRIBUTE.sub(lambda m: m.group(1) + str(PointXY(*next(new_points))) + m.group(3), text)
+    return text, len(rects) + len(points)
+
+
+def rescale_file(file_path, width, height, mode=RESCALE_STRETCH, dry_run=False, use_numpy=True):
+    """ Rescales a single presentation document file. Returns the number of values changed. """
+    with FileLock(file_path):
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        text, changes = rescale_text(data.decode("utf-8"), width, height, mode, use_numpy)
+        if not dry_run and text.encode("utf-8") != data:
+            write_atomic(file_path, text.encode("utf-8"), ".rescale-")
+    return changes
+
+
+def rescale_documents(files, width, height, mode=RESCALE_STRETCH, dry_run=False, workers=None):
+    """
+        Rescales many presentation documents to a new output size in parallel.
+            Returns a dict of file path -> number of values changed.
+    """
+    files = list(files)
+    with ThreadPoolExecutor(workers) as pool:
+        counts = pool.map(lambda fp: rescale_file(fp, width, height, mode, dry_run), files)
+        return dict(zip(files, counts))
@@ -0,0 +1,87 @@
+from ..util.general import unprepare_path
+from ..util.xmlhelp import RV_XML_VARNAME
+
+import xml.etree.ElementTree as Xml
+
+
+# Element tags that carry a media 'source' attribute.
+MEDIA_SOURCE_TAGS = ["RVImageElement", "RVVideoElement", "RVAudioElement"]
+
+# Kinds of media references
+REF_BACKGROUND = "background"       # Background media cue on a slide
+REF_FOREGROUND = "foreground"       # Media element displayed on a slide
+REF_CUE = "cue"                     # Media cue in a slide's list of cues, other than its background
+REF_AUDIO = "audio"                 # Audio cue attached to a slide
+REF_PLAYLIST = "playlist"           # Media or audio cue in a playlist
+REF_DOCUMENT = "document"           # Document cue in a playlist
+
+
+class MediaReference:
+    def __init__(self, document, source, kind, slide=None, playlist=None):
+        self.document = document        # Path of the file containing the reference
+        self.path = source              # Path of the referenced file
+        self.kind = kind
+        self.slide = slide              # UUID of the slide containing the reference (documents only)
+        self.playlist = playlist        # Name path of the playlist containing the reference (playlists only)
+
+    def __repr__(self):
+        return "<MediaReference %s: %s>" % (self.kind, self.path)
+
+
+def _get_uuid(element):
+    return element.get("UUID") or element.get("uuid")
+
+
+def media_kind(parent):
+    """ Returns the kind of a media reference in a document, given its element's parent element (or None). """
+    tag = parent.tag if parent is not None else None
+    if tag == "RVAudioCue":
+        return REF_AUDIO
+    elif tag == "RVMediaCue":
+        # Only the cue in the slide's 'backgroundMediaCue' slot is its background; others are in its 'cues' array.
+        return REF_BACKGROUND if parent.get(RV_XML_VARNAME) == "backgroundMediaCue" else REF_CUE
+    return REF_FOREGROUND
+
+
+def iter_media(file_path):
+    """
+        Streams the media references in a document or playlist file without building its object model.
+            Slides and playlist nodes are discarded as soon as they have been read.
+    """
+    stack = []          # The currently open elements
+    slide = None        # UUID of the current slide
+    nodes = []          # Names of the currently open playlist nodes (excluding the root)
+
+    for event, element in Xml.iterparse(file_path, events=("start", "end")):
+        if event == "end":
+            stack.pop()
+            if element.tag == "RVDisplaySlide":
+                slide = None
+                element.clear()
+            elif element.tag == "RVPlaylistNode":
+                if element.get(RV_XML_VARNAME) != "rootNode":
+                    nodes.pop()
+                element.clear()
+            continue
+
+        tag = element.tag
+        parent = stack[-1] if stack else None
+        stack.append(element)
+
+        if tag == "RVDisplaySlide":
+            slide = _get_uuid(element)
+        elif tag == "RVPlaylistNode":
+            if element.get(RV_XML_VARNAME) != "rootNode":
+                nodes.append(element.get("displayName") or "")
+        elif tag == "RVDocumentCue":
+            source = element.get("filePath")
+            if source:
+                yield MediaReference(file_path, unprepare_path(source), REF_DOCUMENT, playlist="/".join(nodes))
+        elif tag in MEDIA_SOURCE_TAGS:
+            source = element.get("source")
+            if not source:
+                continue
+
+            kind = REF_PLAYLIST if nodes else media_kind(parent)
+            yield MediaReference(file_path, unprepare_path(source), kind,
+                                 slide=slide, playlist="/".join(nodes) if nodes else None)
@@ -0,0 +1,348 @@
+from .watch import EVENT_DELETED
+from ..util.locks import ReadWriteLock, read_locked, write_locked
+from ..util.rtf import rtf_to_text
+from ..util.xmlhelp import RV_XML_VARNAME
+
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import heapq
+import math
+import re
+import xml.etree.ElementTree as Xml
+
+
+# Parts of a slide a hit can be in.
+FIELD_TEXT = "text"         # Plain text of the slide's text elements, one element per line (or more)
+FIELD_NOTES = "notes"       # The slide's notes
+
+# BM25 ranking parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+PHRASE_BOOST = 1.5          # Score multiplier for slides containing the query words next to each other
+
+SNIPPET_WIDTH = 80
+DEFAULT_HIGHLIGHT = ("**", "**")
+
+_WORD = re.compile(r"\w+")
+
+# Strings of a text element holding its text.
+TEXT_VARNAMES = ["PlainText", "RTFData"]
+
+
+def tokenize(text):
+    """ Yields (offset, term) for each word in a string. Terms are case-folded; offsets are into the original. """
+    for m in _WORD.finditer(text):
+        yield m.start(), m.group(0).casefold()
+
+
+class SlideText:
+    """ The searchable text of one slide, decoded once when the document is indexed. """
+    def __init__(self, document, group, group_uuid, uuid, index, label, text, notes):
+        self.document = document        # DocumentMetadata of the document containing the slide; see rebind()
+        self.group = group              # Name of the slide's group
+        self.group_uuid = group_uuid
+        self.uuid = uuid                # UUID of the slide
+        self.index = index              # Position of the slide in the document, counting from 0
+        self.label = label
+        self.text = text
+        self.notes = notes
+
+    @property
+    def content(self):
+        """ The text and notes as one string, which posting offsets refer to. """
+        return self.text + "\n" + self.notes if self.notes else self.text
+
+    def __repr__(self):
+        return "<SlideText %s #%i: %s>" % (getattr(self.document, "name", self.document), self.index, self.uuid)
+
+
+def _get_uuid(element):
+    return element.get("UUID") or element.get("uuid")
+
+
+def element_text(plain_text, rtf):
+    """ Returns the text of a text element: its plain text, or the text of its RTF if there's no plain text. """
+    return plain_text or rtf_to_text(rtf or "")
+
+
+def iter_slide_text(file_path, document=None):
+    """
+        Streams the text of each slide in a presentation document without building its object model.
+            Yields SlideText; 'document' is stored on each one (the file path if not given).
+    """
+    document = document if document is not None else file_path
+    group, group_uuid = "", None
+    slide = None        # The current slide's SlideText, while it's being read
+    texts = []
+    strings = {}        # Varname -> decoded text of the current text element
+    index = 0
+
+    for event, element in Xml.iterparse(file_path, events=("start", "end")):
+        tag = element.tag
+        if event == "start":
+            if tag == "RVSlideGrouping":
+                group, group_uuid = element.get("name") or "", _get_uuid(element)
+            elif tag == "RVDisplaySlide":
+                slide = SlideText(document, group, group_uuid, _get_uuid(element), index,
+                                  element.get("label") or "", "", element.get("notes") or "")
+                texts, strings = [], {}
+        elif tag == "NSString" and slide is not None and element.get(RV_XML_VARNAME) in TEXT_VARNAMES:
+            if element.text:
+                strings[element.get(RV_XML_VARNAME)] = base64.b64decode(element.text).decode("utf-8")
+        elif tag == "RVTextElement" and slide is not None:
+            text = element_text(strings.get("PlainText"), strings.get("RTFData"))
+            if text:
+                texts.append(text)
+            strings = {}
+        elif tag == "RVDisplaySlide":
+            slide.text = "\n".join(texts)
+            yield slide
+            slide = None
+            index += 1
+            element.clear()
+
+
+class TextHit:
+    def __init__(self, slide, score, field, line, offset, snippet):
+        self.slide = slide              # SlideText of the matching slide
+        self.score = score
+        self.field = field              # FIELD_TEXT or FIELD_NOTES
+        self.line = line                # Line of the field containing the first match, counting from 0
+        self.offset = offset            # Offset of the first match within the field
+        self.snippet = snippet          # The matching line with the query words highlighted
+
+    @property
+    def document(self):
+        return self.slide.document
+
+    @property
+    def group(self):
+        return self.slide.group
+
+    @property
+    def slide_uuid(self):
+        return self.slide.uuid
+
+    def __repr__(self):
+        return "<TextHit (%.2f) %s #%i: %s>" % (self.score, getattr(self.document, "name", self.document),
+                                                self.slide.index, self.snippet)
+
+
+class TextIndex:
+    """
+        An inverted index of the words on every slide of a set of documents.
+            Each word maps to postings of (slide, offsets), and each slide keeps its decoded text, so hits can be
+            located and shown in context without reading the documents again. Safe to share between threads.
+    """
+    def __init__(self):
+        self.lock = ReadWriteLock()
+        self._slides = {}           # Slide id -> SlideText
+        self._lengths = {}          # Slide id -> number of words
+        self._postings = {}         # Term -> {slide id: [offsets into SlideText.content]}
+        self._documents = {}        # Document key -> [slide ids]
+        self.errors = {}            # Document key -> exception raised the last time it couldn't be read
+        self._total_length = 0
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._documents)
+
+    @staticmethod
+    def _key(document):
+        return getattr(document, "path", document)
+
+    @write_locked
+    def add(self, document, slides):
+        """ Indexes the slides (SlideText) of a document, replacing any slides already indexed for it. """
+        self.remove(document)
+        ids = []
+        for slide in slides:
+            slide_id = self._next_id
+            self._next_id += 1
+            ids.append(slide_id)
+
+            self._slides[slide_id] = slide
+            length = 0
+            for offset, term in tokenize(slide.content):
+                self._postings.setdefault(term, {}).setdefault(slide_id, []).append(offset)
+                length += 1
+            self._lengths[slide_id] = length
+            self._total_length += length
+        self._documents[self._key(document)] = ids
+
+    @write_locked
+    def remove(self, document):
+        """ Removes a document's slides from the index. """
+        ids = self._documents.pop(self._key(document), None)
+        for slide_id in ids or []:
+            slide = self._slides.pop(slide_id)
+            self._total_length -= self._lengths.pop(slide_id)
+            for _, term in tokenize(slide.content):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(slide_id, None)
+                    if not postings:
+                        del self._postings[term]
+
+    @write_locked
+    def rebind(self, document):
+        """
+            Points the slides indexed for a document's file at a new metadata object for the same file, without
+                reading it again. Used when the library replaces a document's metadata but not its content.
+        """
+        for slide_id in self._documents.get(self._key(document), []):
+            self._slides[slide_id].document = document
+
+    def add_file(self, document, file_path=None):
+        """ Reads and indexes a document file. 'document' is usually its DocumentMetadata. """
+        file_path = file_path or document.path
+        self.add(document, list(iter_slide_text(file_path, document)))
+
+    def add_files(self, documents, workers=None):
+        """
+            Reads and indexes many documents (DocumentMetadata) in parallel. Unreadable documents are skipped and
+                listed in 'errors'.
+        """
+        def read(meta):
+            try:
+                return meta, list(iter_slide_text(meta.path, meta))
+            except (OSError, Xml.ParseError, ValueError) as ex:
+                return meta, ex
+
+        with ThreadPoolExecutor(workers) as pool:
+            for meta, slides in pool.map(read, documents):
+                if isinstance(slides, Exception):
+                    self.errors[self._key(meta)] = slides
+                else:
+                    self.errors.pop(self._key(meta), None)
+                    self.add(meta, slides)
+
+    def on_library_events(self, events):
+        """ Keeps the index up to date with a DocumentLibrary. Pass to DocumentLibrary.subscribe(). """
+        for event in events:
+            key = self._key(event.document)
+            if event.kind == EVENT_DELETED:
+                self.remove(event.document)
+                self.errors.pop(key, None)
+            else:
+                try:
+                    self.add_file(event.document)
+                    self.errors.pop(key, None)
+                except (OSError, Xml.ParseError, ValueError) as ex:
+                    self.errors[key] = ex
+                    self.remove(event.document)
+
+    @read_locked
+    def candidates(self, text):
+        """
+            Returns the set of documents with a slide that could contain the text, ignoring case, or None if the
+                text has no words to look up. Words at the ends of the text may be parts of longer words.
+        """
+        tokens = [(m.start(), m.end(), m.group(0).casefold()) for m in _WORD.finditer(text)]
+        if not tokens:
+            return None
+
+        slides = None
+        for start, end, token in tokens:
+            if start > 0 and end < len(text):
+                terms = [token] if token in self._postings else []
+            elif start > 0:
+                terms = [term for term in self._postings if term.startswith(token)]
+            elif end < len(text):
+                terms = [term for term in self._postings if term.endswith(token)]
+            else:
+                terms = [term for term in self._postings if token in term]
+
+            found = set()
+            for term in terms:
+                found.update(self._postings[term])
+            slides = found if slides is None else slides & found
+            if not slides:
+                return set()
+        return {self._slides[slide_id].document for slide_id in slides}
+
+    @read_locked
+    def _rank(self, terms, phrase):
+        postings = [self._postings.get(term) for term in terms]
+        if not all(postings):
+            return []
+
+        # Every word must be on the slide; start from the rarest.
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            candidates.intersection_update(p)
+
+        count = len(self._slides)
+        average = self._total_length / count if count else 0
+        heap = []
+        for slide_id in candidates:
+            length = self._lengths[slide_id]
+            score = 0.0
+            offsets = []
+            for p in postings:
+                tf = len(p[slide_id])
+                idf = math.log(1 + (count - len(p) + 0.5) / (len(p) + 0.5))
+                score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / average))
+                offsets.extend(p[slide_id])
+
+            slide = self._slides[slide_id]
+            if phrase is not None and phrase.search(slide.content):
+                score *= PHRASE_BOOST
+            heap.append((-score, slide_id, slide, min(offsets)))
+        heapq.heapify(heap)
+        return heap
+
+    def search(self, query, limit=None, highlight=DEFAULT_HIGHLIGHT, width=SNIPPET_WIDTH):
+        """
+            Finds the slides containing every word of the query, ignoring case. Yields TextHit, most relevant first.
+                Slides are ranked with BM25, and slides with the words in order are ranked higher. The snippets are
+                only made as hits are taken from the generator.
+        """
+        terms = list(dict.fromkeys(term for _, term in tokenize(query)))
+        if not terms:
+            return
+
+        words = [m.group(0) for m in _WORD.finditer(query)]
+        phrase = re.compile(r"\W+".join(re.escape(w) for w in words), re.IGNORECASE) if len(words) > 1 else None
+        pattern = re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + r")\b", re.IGNORECASE)
+
+        heap = self._rank(terms, phrase)
+        found = 0
+        while heap and (limit is None or found < limit):
+            score, _, slide, offset = heapq.heappop(heap)
+            yield self._hit(slide, -score, offset, pattern, highlight, width)
+            found += 1
+
+    @staticmethod
+    def _hit(slide, score, offset, pattern, highlight, width):
+        field, text = FIELD_TEXT, slide.text
+        if offset > len(text):
+            field, text, offset = FIELD_NOTES, slide.notes, offset - len(text) - 1
+
+        line = text.count("\n", 0, offset)
+        start = text.rfind("\n", 0, offset) + 1
+        end = text.find("\n", offset)
+        end = len(text) if end == -1 else end
+        return TextHit(slide, score, field, line, offset, snippet(text[start:end], offset - start, pattern,
+                                                                 highlight, width))
+
+
+def snippet(line, offset, pattern, highlight=DEFAULT_HIGHLIGHT, width=SNIPPET_WIDTH):
+    """
+        Returns up to about 'width' characters of a line around the given offset, with each match of the pattern
+            wrapped in the highlight (before, after) strings. Trimmed ends are marked with '...'.
+    """
+    start, end = 0, len(line)
+    if end > width:
+        start = max(0, min(offset - width // 3, end - width))
+        end = start + width
+        # Don't cut words in half.
+        while 0 < start < offset and line[start - 1].isalnum() and line[start].isalnum():
+            start += 1
+        while end < len(line) and end > offset and line[end - 1].isalnum() and line[end].isalnum():
+            end -= 1
+
+    before, after = highlight
+    result = pattern.sub(lambda m: before + m.group(0) + after, line[start:end])
+    return ("..." if start > 0 else "") + result + ("..." if end < len(line) else "")
@@ -0,0 +1,79 @@
+import os
+import threading
+
+
+# Kinds of library change events
+EVENT_ADDED = "add"
+EVENT_UPDATED = "update"
+EVENT_DELETED = "delete"
+
+
+class LibraryEvent:
+    def __init__(self, kind, document):
+        self.kind = kind
+        self.document = document        # DocumentMetadata of the affected document
+
+    def __repr__(self):
+        return "<LibraryEvent %s: %s>" % (self.kind, self.document.name)
+
+
+def scan_documents(library_path):
+    """ Returns a dict of document file path -> (mtime, size) for the documents in a folder. """
+    found = {}
+    with os.scandir(library_path) as entries:
+        for entry in entries:
+            if entry.name.lower().endswith(".pro6") and entry.is_file():
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue        # Removed since the folder was listed.
+                found[entry.path] = (st.st_mtime_ns, st.st_size)
+    return found
+
+
+class LibraryWatcher:
+    """
+        Keeps a DocumentLibrary up to date by polling its folder from a background thread.
+            Each poll is a single directory scan; only files that changed are re-read. Polling is used
+            rather than platform notification APIs so it behaves the same everywhere, including network shares.
+    """
+    def __init__(self, library, interval=2.0):
+        self.library = library
+        self.interval = interval
+        self.last_error = None          # Exception raised by the most recent poll that failed
+        self.failures = 0               # Number of polls that failed
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="LibraryWatcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            # Any error (including one raised by a subscriber) only affects this batch of events. It's kept for
+            #   the owner of the watcher to check, as there's no caller to raise it to.
+            try:
+                self.library.refresh()
+            except Exception as ex:
+                self.last_error = ex
+                self.failures += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
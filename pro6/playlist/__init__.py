@@ -1,5 +1,6 @@
 
 from .cues import DocumentCue, HeaderCue
 from .document import PlaylistDocument
+from .index import PlaylistIndex
 from .node import PlaylistNode
 from .node import NODE_ROOT, NODE_FOLDER, NODE_PLAYLIST
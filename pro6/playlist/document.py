@@ -1,9 +1,13 @@
 
-from .node import PlaylistNode
+from .index import PlaylistIndex
+from .node import PlaylistNode, NODE_ROOT
 
-from ..preferences import install as pro6_install
+from ..preferences import get_install
+from ..util.aio import EXECUTOR_PARSE, EXECUTOR_WRITE, resolve_executor
 from ..util.compat import *
 from ..util.constants import RV_VERSION_NUMBER
+from ..util.general import cached_classproperty
+from ..util.locks import FileLock, ReadWriteLock, read_locked, write_atomic
 from ..util.xmlhelp import XmlBackedObject, RV_XML_VARNAME, create_array
 
 from os import path
@@ -11,8 +15,6 @@ from xml.etree import ElementTree as Xml
 
 
 class PlaylistDocument(XmlBackedObject):
-    active = None
-
     def __init__(self, **extra):
         defaults = {
             "versionNumber": RV_VERSION_NUMBER,
@@ -23,27 +25,65 @@ class PlaylistDocument(XmlBackedObject):
         super().__init__("RVPlaylistDocument", defaults)
         self.path = None
 
-        self.root = PlaylistNode("root")
+        self.root = PlaylistNode("root", NODE_ROOT)
+        self.root.index = PlaylistIndex()
+        self.root.lock = ReadWriteLock()
         self.deletions = []
 
+    @cached_classproperty
+    def active(cls):
+        """ The playlist document of the local ProPresenter installation's active library, or None. """
+        pro6_install = get_install()
+        if not pro6_install:
+            return None
+        return cls.load(path.join(pro6_install.playlist_path, pro6_install.active_library + ".pro6pl"))
+
+    @property
+    def lock(self):
+        """ The ReadWriteLock shared by every node in the document. Node changes hold it for writing. """
+        return self.root.lock
+
+    @read_locked
     def items(self):
         """ Returns the top-level playlist nodes in this document. """
         return list(self.root.children)
 
+    def find(self, item):
+        """ Finds the playlist node with the given name or path (list of names) from the root. Case-insensitive. """
+        return self.root.find(item)
+
+    @read_locked
+    def find_all(self, name):
+        """ Returns all playlist nodes with the given name, at any depth. Case-insensitive. """
+        return self.root.index.named(name)
+
+    @read_locked
+    def glob(self, pattern):
+        """ Returns all playlist nodes whose path (names joined by '/') matches a shell-style pattern. """
+        return self.root.index.glob(pattern)
+
+    def iter_cues(self):
+        """ Yields every cue in the document, depth-first. """
+        return self.root.iter_cues()
+
     def write(self, file_path=None):
-        e = super().write()
-        e.append(self.root.write())
-        e.append(create_array("deletions", self.deletions))
+        with self.lock.read():
+            e = super().write()
+            e.append(self.root.write())
+            e.append(create_array("deletions", self.deletions))
 
         self.path = file_path or self.path
         if self.path:
-            Xml.ElementTree(e).write(self.path, encoding="utf-8", xml_declaration=True)
+            with FileLock(self.path):
+                write_atomic(self.path, Xml.tostring(e, encoding="utf-8", xml_declaration=True))
         return e
 
     def read(self, element):
         super().read(element)
 
         self.root = PlaylistNode(None).read(element.find("RVPlaylistNode[@" + RV_XML_VARNAME + "='rootNode']"))
+        self.root.index = PlaylistIndex(self.root)
+        self.root.lock = ReadWriteLock()
         return self
 
     @classmethod
@@ -61,7 +101,12 @@ class PlaylistDocument(XmlBackedObject):
 
         return document
 
+    @classmethod
+    async def aload(cls, file_path, executor=None):
+        """ Loads a playlist document without blocking the event loop. See pro6.util.aio for executor settings. """
+        return await resolve_executor(executor, EXECUTOR_PARSE).run(cls.load, file_path)
+
+    async def awrite(self, file_path=None, executor=None):
+        """ Writes the playlist document without blocking the event loop. """
+        return await resolve_executor(executor, EXECUTOR_WRITE).run(self.write, file_path)
 
-if pro6_install:
-    PlaylistDocument.active = \
-        PlaylistDocument.load(path.join(pro6_install.playlist_path, pro6_install.active_library + ".pro6pl"))
@@ -0,0 +1,56 @@
+from fnmatch import fnmatchcase
+
+
+def _key(names):
+    return tuple((name or "").lower() for name in names)
+
+
+class PlaylistIndex:
+    """
+        Case-insensitive lookup of playlist nodes by their full path and by name.
+            The index is kept up to date by PlaylistNode.add(), remove(), rename() and clear().
+    """
+    def __init__(self, root=None):
+        self._paths = {}        # (lowercase names from the root) -> [nodes]
+        self._names = {}        # lowercase name -> [nodes]
+
+        if root is not None:
+            for child in root.children:
+                self.add(child)
+
+    def __len__(self):
+        return sum(len(nodes) for nodes in self._paths.values())
+
+    def add(self, node):
+        """ Adds a node and all of its descendants to the index. """
+        for n in node.walk():
+            self._paths.setdefault(_key(n.get_path()), []).append(n)
+            self._names.setdefault((n.name or "").lower(), []).append(n)
+
+    def remove(self, node):
+        """ Removes a node and all of its descendants from the index. """
+        for n in node.walk():
+            for table, key in [(self._paths, _key(n.get_path())), (self._names, (n.name or "").lower())]:
+                nodes = table.get(key)
+                if nodes and n in nodes:
+                    nodes.remove(n)
+                    if not nodes:
+                        del table[key]
+
+    def clear(self):
+        self._paths.clear()
+        self._names.clear()
+
+    def get(self, names):
+        """ Returns the first node at the given path (a list of names), or None. """
+        nodes = self._paths.get(_key(names))
+        return nodes[0] if nodes else None
+
+    def named(self, name):
+        """ Returns all nodes with the given name, anywhere in the tree. """
+        return list(self._names.get(name.lower(), []))
+
+    def glob(self, pattern):
+        """ Returns all nodes whose '/' separated path matches a shell-style pattern. """
+        pattern = pattern.lower()
+        return [n for key, nodes in self._paths.items() if fnmatchcase("/".join(key), pattern) for n in nodes]
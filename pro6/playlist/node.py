@@ -3,6 +3,7 @@ from .cues import DocumentCue
 
 from ..document import MediaCue, AudioCue
 from ..util.general import parse_date
+from ..util.locks import NULL_LOCK, read_locked, write_locked
 from ..util.xmlhelp import XmlBackedObject, RV_XML_VARNAME, create_array
 
 from datetime import datetime
@@ -31,17 +32,32 @@ class PlaylistNode(XmlBackedObject):
         self.children = []
         self.events = []
         self.parent = None
+        self.index = None       # Set on the root node of a document. See PlaylistIndex.
+        self._lock = None       # Set on the root node of a document. See lock.
 
     @property
     def is_folder(self):
         return self.type in [NODE_ROOT, NODE_FOLDER]
 
+    @property
+    def lock(self):
+        """ The document's ReadWriteLock, shared by all of its nodes. Detached nodes aren't locked. """
+        node = self
+        while node.parent is not None:
+            node = node.parent
+        return node._lock or NULL_LOCK
+
+    @lock.setter
+    def lock(self, value):
+        self._lock = value
+
     def __iter__(self):
         return iter(self.children)
 
     def __len__(self):
         return len(self.children)
 
+    @write_locked
     def add_path(self, fp):
         """ Adds a file to the playlist. """
         if self.type != NODE_PLAYLIST:
@@ -54,26 +70,109 @@ class PlaylistNode(XmlBackedObject):
             self.children.append(MediaCue.create(fp))
         self.modified = datetime.now()
 
+    def get_path(self):
+        """ Returns the names of the nodes leading to this one, starting below the root. """
+        names = []
+        node = self
+        while node is not None and node.type != NODE_ROOT:
+            names.append(node.name)
+            node = node.parent
+        return names[::-1]
+
+    def walk(self):
+        """ Yields this node and all of its descendant nodes, depth-first. """
+        yield self
+        for child in self.children:
+            if isinstance(child, PlaylistNode):
+                yield from child.walk()
+
+    def iter_cues(self):
+        """ Yields every cue in this node and its descendants, depth-first. """
+        for child in self.children:
+            if isinstance(child, PlaylistNode):
+                yield from child.iter_cues()
+            else:
+                yield child
+
+    def _get_index(self):
+        node = self
+        while node.parent is not None:
+            node = node.parent
+        return node.index
+
+    @write_locked
+    def add(self, item):
+        """ Adds a child node or cue to this node. """
+        if isinstance(item, PlaylistNode):
+            if not self.is_folder:
+                raise Exception("Can't add playlist node to a playlist.")
+            item.parent = self
+            self.children.append(item)
+
+            index = self._get_index()
+            if index is not None:
+                index.add(item)
+        else:
+            if self.type != NODE_PLAYLIST:
+                raise Exception("Can't add cue to playlist folder.")
+            self.children.append(item)
+        self.modified = datetime.now()
+
+    @write_locked
+    def remove(self, item):
+        """ Removes a child node or cue from this node. """
+        if item not in self.children:
+            raise ValueError("Item not found in playlist node '%s'." % self.name)
+
+        if isinstance(item, PlaylistNode):
+            index = self._get_index()
+            if index is not None:
+                index.remove(item)
+            item.parent = None
+        self.children.remove(item)
+        self.modified = datetime.now()
+
+    @write_locked
+    def rename(self, name):
+        """ Changes the name of this node. """
+        index = self._get_index()
+        if index is not None:
+            index.remove(self)
+        self.name = name
+        if index is not None:
+            index.add(self)
+        self.modified = datetime.now()
+
+    @read_locked
     def find(self, item):
         """
-            Finds a playlist with the given name or path.
-                If path is str, returns the first playlist with a matching name.
-                If path is a list, attempts to navigate through each item as a child node.
+            Finds a playlist with the given name or path. Case-insensitive.
+                If item is str, returns the child node with a matching name.
+                If item is a list, attempts to navigate through each item as a child node.
         """
-        for child in self.children:
-            is_list = isinstance(item, list)
-            target = item[0] if is_list else item
+        names = item if isinstance(item, list) else [item]
 
-            if hasattr(child, "name") and child.name.lower() == target.lower():
-                # If it's a list and we're not on the last item, only return matching nodes.
-                if is_list and len(item) > 1 and isinstance(child, PlaylistNode):
-                    return child.find(path[1:] if len(item) > 2 else item[1])
-                else:
-                    return child
-        return None
+        index = self._get_index()
+        if index is not None:
+            return index.get(self.get_path() + names)
 
+        node = self
+        for name in names:
+            node = next((c for c in node.children
+                         if isinstance(c, PlaylistNode) and c.name.lower() == name.lower()), None)
+            if node is None:
+                break
+        return node
+
+    @write_locked
     def clear(self):
         """ Removes all children from this element. """
+        index = self._get_index()
+        for child in self.children:
+            if isinstance(child, PlaylistNode):
+                if index is not None:
+                    index.remove(child)
+                child.parent = None
         self.children.clear()
         self.modified = datetime.now()
 
@@ -1,8 +1,24 @@
-
 from .base import Pro6Preferences
 from .error import InstallNotFoundError, InvalidInstallError
 
-try:
-    install = Pro6Preferences.load()
-except (InstallNotFoundError, InvalidInstallError):
-    install = None
+_install = None
+_loaded = False
+
+
+def get_install():
+    """ Returns the preferences of the local ProPresenter installation, or None. Loaded on first use. """
+    global _install, _loaded
+    if not _loaded:
+        try:
+            _install = Pro6Preferences.load()
+        except (InstallNotFoundError, InvalidInstallError):
+            _install = None
+        _loaded = True
+    return _install
+
+
+def __getattr__(name):
+    # 'install' is still available as a module attribute but is only loaded when it's first accessed.
+    if name == "install":
+        return get_install()
+    raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
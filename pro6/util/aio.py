@@ -0,0 +1,84 @@
+import functools
+
+
+# Names of the shared executors used by the async methods.
+EXECUTOR_PARSE = "parse"        # Reading and parsing documents
+EXECUTOR_WRITE = "write"        # Serializing and writing documents
+EXECUTOR_PROBE = "probe"        # Reading media file metadata
+
+DEFAULT_LIMIT = 8
+
+
+class AsyncExecutor:
+    """
+        Runs blocking functions for coroutines on an executor, with at most 'limit' calls in progress at once.
+            If no executor is given the event loop's default thread pool is used. Methods that update objects in
+            place (such as DocumentLibrary.ascan) need a thread-based executor.
+    """
+    def __init__(self, executor=None, limit=DEFAULT_LIMIT):
+        self.executor = executor
+        self.limit = limit
+        self._loop = None
+        self._semaphore = None
+
+    def _get_semaphore(self):
+        import asyncio      # Imported on first use, so programs that don't use the async methods don't pay for it.
+
+        # Semaphores belong to an event loop, so a new one is made if the executor is used from another loop.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.limit)
+        return self._semaphore
+
+    async def run(self, func, *args, **kwargs):
+        """ Calls a function on the executor and returns its result. """
+        import asyncio
+        async with self._get_semaphore():
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs))
+
+    async def imap(self, func, items):
+        """
+            Calls a function for each item and yields the results in the order they finish.
+                Items are taken from the iterable as work completes, so it can be long or unbounded.
+        """
+        import asyncio
+        items = iter(items)
+        pending = set()
+        try:
+            while True:
+                for item in items:
+                    pending.add(asyncio.ensure_future(self.run(func, item)))
+                    if len(pending) >= self.limit:
+                        break
+                if not pending:
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+_executors = {}
+
+
+def get_executor(name):
+    """ Returns the shared AsyncExecutor with the given name, creating one with the default settings if needed. """
+    if name not in _executors:
+        _executors[name] = AsyncExecutor()
+    return _executors[name]
+
+
+def configure_executor(name, executor=None, limit=DEFAULT_LIMIT):
+    """ Replaces a shared AsyncExecutor, for example to give media probing its own pool or a lower limit. """
+    _executors[name] = AsyncExecutor(executor, limit)
+    return _executors[name]
+
+
+def resolve_executor(executor, name):
+    """ Returns the given AsyncExecutor, or the shared one with the given name if None. """
+    return executor or get_executor(name)
@@ -28,3 +28,7 @@ PLAYBACK_LOOP = "1"
 # Layers
 LAYER_BACKGROUND = "1"
 LAYER_FOREGROUND = "2"
+
+# Library daemon
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 60106
@@ -1,22 +1,43 @@
 
 from pro6.util.compat import *
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import os
 import pathlib
+import re
 from urllib.parse import quote, unquote, urlparse
 import uuid
 
 
 NULL_UUID = "00000000-0000-0000-0000-000000000000"
 
+PATH_CACHE_SIZE = 4096
+DATE_CACHE_SIZE = 4096
+
+# The date format used in documents: %Y-%m-%dT%H:%M:%S%z, with or without a colon in the UTC offset.
+_DATE_FORMAT = re.compile(r"([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})"
+                          r"(?:([+-])([0-9]{2}):?([0-5][0-9])|Z)")
+
+
+class cached_classproperty:
+    """ A class attribute computed by a function on first access. The result replaces the attribute. """
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, obj, owner):
+        value = self.func(owner)
+        setattr(owner, self.func.__name__, value)
+        return value
+
 
 def create_uuid():
     return str(uuid.uuid4())
 
 
-def prepare_path(path_str, enviro=None):
-    enviro = enviro or get_os()
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _prepare_path(path_str, enviro):
     pth = pathlib.Path(path_str)
     if enviro == OS_WINDOWS:
         return quote(os.path.normpath(pth.as_posix()))
@@ -24,27 +45,77 @@ def prepare_path(path_str, enviro=None):
         return pth.as_uri().replace("file:///", "file://localhost/")
 
 
-def unprepare_path(path_str):
-    if path_str is None:
-        return ""
-    
+def prepare_path(path_str, enviro=None):
+    return _prepare_path(path_str, enviro or get_os())
+
+
+@lru_cache(maxsize=PATH_CACHE_SIZE)
+def _decode_path(path_str):
     pth = urlparse(path_str)           # Break the path down into components (specifically for Windows where it's a URL)
     if pth.scheme == "file":
         path_str = pth.path            # If the path is to a file get rid of the extra markers
 
-    path_str = unquote(path_str)       # Remove Windows/HTML character encoding (%20 == ' ', etc)
+    return unquote(path_str)           # Remove Windows/HTML character encoding (%20 == ' ', etc)
+
+
+def unprepare_path(path_str):
+    if path_str is None:
+        return ""
+
+    # Decoding is cached, but variables are expanded every time as the environment can change.
+    path_str = _decode_path(path_str)
     return os.path.expanduser(os.path.expandvars(path_str))     # Expand OS variables
 
 
+def normalize_path(path_str):
+    """ Returns a comparable form of a file path. Windows paths become case-insensitive and use forward slashes. """
+    path_str = path_str.replace("\\", "/").rstrip("/")
+    is_windows = (len(path_str) > 1 and path_str[1] == ":") or path_str.startswith("//")
+    return path_str.lower() if is_windows else path_str
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _timezone(minutes):
+    return timezone(timedelta(minutes=minutes))
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date(s):
+    # Dates are nearly always written in the same format, which is much faster to take apart by hand than with
+    #   strptime. Anything else is left to strptime so that it's handled (or rejected) the same as before.
+    match = _DATE_FORMAT.fullmatch(s)
+    if match is None:
+        if len(s) == 25:
+            # Remove the colon from the UTC offset specifier.
+            s = s[:22] + s[23:]
+        return datetime.strptime(s, "%Y-%m-%dT%H:%M:%S%z")
+
+    year, month, day, hour, minute, second, sign, tz_hours, tz_minutes = match.groups()
+    offset = 0
+    if sign:
+        offset = int(tz_hours) * 60 + int(tz_minutes)
+        offset = -offset if sign == "-" else offset
+    return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second), tzinfo=_timezone(offset))
+
+
 def parse_date(s):
     if not s or len(s) == 0:
         return None
-    elif len(s) == 25:
-        # Remove the colon from the UTC offset specifier.
-        s = s[:22] + s[23:]
-    return datetime.strptime(s, "%Y-%m-%dT%H:%M:%S%z")
+    return _parse_date(s)
 
 
 def format_date(dt):
+    if type(dt) is datetime and dt.year >= 1000:
+        text = "%04d-%02d-%02dT%02d:%02d:%02d" % (dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second)
+        offset = dt.utcoffset()
+        if offset is None:
+            return text
+
+        seconds = offset.days * 86400 + offset.seconds
+        if seconds % 60 == 0 and not offset.microseconds:
+            minutes = abs(seconds) // 60
+            return "%s%s%02d:%02d" % (text, "-" if seconds < 0 else "+", minutes // 60, minutes % 60)
+
+    # Unusual dates and offsets are formatted by strftime.
     s = dt.strftime("%Y-%m-%dT%H:%M:%S%z")
     return s if len(s) == 19 else s[:22] + ':' + s[22:]
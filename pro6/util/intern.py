@@ -0,0 +1,54 @@
+import sys
+
+
+# Attribute values longer than this are rarely repeated, so they aren't worth looking up.
+MAX_VALUE_LENGTH = 256
+
+
+class InternPool:
+    """
+        Returns a single shared instance for equal strings (or bytes), so repeated values across loaded documents
+            only use memory once. The pool is emptied when it grows past 'max_size' total characters, which bounds
+            its own memory use in long-running processes. Values already handed out stay shared.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self._values = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def __call__(self, value):
+        shared = self._values.get(value)
+        if shared is not None:
+            return shared
+
+        if self.size + len(value) > self.max_size:
+            self.clear()
+        self._values[value] = value
+        self.size += len(value)
+        return value
+
+    def clear(self):
+        self._values = {}
+        self.size = 0
+
+
+# Shared pools for attribute values and for decoded payloads (RTF, font and flow data) of text elements.
+attribute_pool = InternPool(4 * 1024 * 1024)
+payload_pool = InternPool(32 * 1024 * 1024)
+
+
+def intern_attrib(attrib):
+    """
+        Returns a copy of an XML attribute dict using shared key and value strings. Empty values become None.
+    """
+    result = {}
+    for k, v in attrib.items():
+        if v == "":
+            v = None
+        elif len(v) <= MAX_VALUE_LENGTH:
+            v = attribute_pool(v)
+        result[sys.intern(k)] = v
+    return result
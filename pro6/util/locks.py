@@ -0,0 +1,254 @@
+from contextlib import contextmanager
+import functools
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+
+LOCK_DIRECTORY = os.path.join(tempfile.gettempdir(), "pro6utils-locks")
+LOCK_RETRY_INTERVAL = 0.05
+
+# The umask can only be read by changing it, which isn't thread-safe, so it's read once on import.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+class ReadWriteLock:
+    """
+        Allows many threads to read at once, or one thread to write. Waiting writers take priority over new readers.
+            Both kinds of lock can be re-acquired by the thread holding them, and a writer may also take read locks.
+            A thread holding only a read lock can't acquire the write lock (this raises RuntimeError).
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None             # Ident of the thread holding the write lock
+        self._write_depth = 0
+        self._waiting_writers = 0
+        self._local = threading.local()  # Number of read locks held by each thread
+
+    def acquire_read(self):
+        depth = getattr(self._local, "depth", 0)
+        with self._cond:
+            if not depth and self._writer != threading.get_ident():
+                while self._writer is not None or self._waiting_writers:
+                    self._cond.wait()
+            self._readers += 1
+        self._local.depth = depth + 1
+
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+        self._local.depth -= 1
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._writer == me:
+                self._write_depth += 1
+                return
+            if getattr(self._local, "depth", 0):
+                raise RuntimeError("A read lock can't be upgraded to a write lock.")
+
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+
+    def release_write(self):
+        with self._cond:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
+
+
+class NullLock:
+    """ Has the same interface as ReadWriteLock but doesn't lock anything. Used by objects that aren't shared. """
+    @contextmanager
+    def read(self):
+        yield self
+
+    @contextmanager
+    def write(self):
+        yield self
+
+
+NULL_LOCK = NullLock()
+
+
+def read_locked(method):
+    """ Decorates a method to run while holding a read lock on the object's 'lock' attribute. """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def write_locked(method):
+    """ Decorates a method to run while holding a write lock on the object's 'lock' attribute. """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class _FileLockState:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+        self.users = 0              # Threads holding (counting each re-entry) or waiting for the lock
+
+
+_file_locks = {}                # Absolute file path -> _FileLockState, while the lock is held or awaited
+_file_locks_guard = threading.Lock()
+
+
+def _lock_handle(handle):
+    if fcntl:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        return
+
+    # msvcrt only waits for about 10 seconds before failing, so keep retrying until the lock is free.
+    handle.seek(0)
+    while True:
+        try:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            time.sleep(LOCK_RETRY_INTERVAL)
+
+
+def _unlock_handle(handle):
+    if fcntl:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    else:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+        An exclusive advisory lock on a file, shared between threads and processes.
+            The lock is held on a separate file in the temporary folder (named after a hash of the target's path),
+            so the target can be replaced or deleted while locked and library folders aren't cluttered.
+            The lock is re-entrant within a thread. Other threads in the same process wait on the thread
+            holding it; other processes wait on the operating system lock.
+    """
+    def __init__(self, file_path):
+        self.path = os.path.normcase(os.path.abspath(file_path))
+        digest = hashlib.sha1(self.path.encode("utf-8", "surrogateescape")).hexdigest()
+        self.lock_path = os.path.join(LOCK_DIRECTORY, digest + ".lock")
+
+    def _use(self):
+        # Threads holding or waiting for the lock are counted, so its state can be dropped when none are left.
+        with _file_locks_guard:
+            state = _file_locks.setdefault(self.path, _FileLockState())
+            state.users += 1
+            return state
+
+    def _unuse(self, state):
+        with _file_locks_guard:
+            state.users -= 1
+            if not state.users:
+                del _file_locks[self.path]
+
+    def acquire(self):
+        state = self._use()
+        try:
+            state.lock.acquire()
+        except BaseException:
+            self._unuse(state)
+            raise
+
+        try:
+            if not state.depth:
+                os.makedirs(LOCK_DIRECTORY, exist_ok=True)
+                handle = open(self.lock_path, "a+b")
+                try:
+                    _lock_handle(handle)
+                except BaseException:
+                    handle.close()
+                    raise
+                state.handle = handle
+            state.depth += 1
+        except BaseException:
+            state.lock.release()
+            self._unuse(state)
+            raise
+
+    def release(self):
+        with _file_locks_guard:
+            state = _file_locks[self.path]
+        state.depth -= 1
+        try:
+            if not state.depth:
+                try:
+                    _unlock_handle(state.handle)
+                finally:
+                    state.handle.close()
+                    state.handle = None
+        finally:
+            state.lock.release()
+            self._unuse(state)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+def write_atomic(file_path, data, prefix=".pro6utils-"):
+    """ Writes bytes to a file through a temporary file, so readers never see a partially written file. """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(prefix=prefix, dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(file_path):
+            os.chmod(temp_path, os.stat(file_path).st_mode & 0o7777)
+        else:
+            os.chmod(temp_path, 0o666 & ~_UMASK)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
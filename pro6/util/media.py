@@ -1,6 +1,5 @@
 
-import hachoir.parser
-import hachoir.metadata
+from .aio import EXECUTOR_PROBE, resolve_executor
 
 from os import path
 
@@ -39,6 +38,9 @@ class MediaFile:
         """ Parses and returns file metadata. Invalid media files return None. """
         if (self._extract_failed is False and self.metadata is None) or reload:
             if self.exists():
+                import hachoir.parser       # Deferred because it is slow to import and only needed here.
+                import hachoir.metadata
+
                 parser = hachoir.parser.createParser(self.path)
                 if parser:
                     with parser:
@@ -48,6 +50,10 @@ class MediaFile:
 
         return self.metadata or {}
 
+    async def aprobe(self, reload=False, executor=None):
+        """ Reads the file's metadata without blocking the event loop. Returns the same as get_metadata(). """
+        return await resolve_executor(executor, EXECUTOR_PROBE).run(self.get_metadata, reload)
+
     def frame_size(self, default=None):
         """ Returns a tuple containing (width, height) of the media content. """
         default = default or (0, 0)
@@ -69,3 +75,13 @@ class MediaFile:
             return dur.total_seconds() if dur else 0
         except ValueError:
             return 0
+
+
+async def aprobe_all(files, executor=None):
+    """ Reads the metadata of many media files concurrently, yielding (MediaFile, metadata) as each finishes. """
+    def probe(media):
+        return media, media.get_metadata()
+
+    media_files = (f if isinstance(f, MediaFile) else MediaFile(f) for f in files)
+    async for result in resolve_executor(executor, EXECUTOR_PROBE).imap(probe, media_files):
+        yield result
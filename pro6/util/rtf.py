@@ -0,0 +1,180 @@
+from functools import lru_cache
+import codecs
+import re
+
+
+RTF_CACHE_SIZE = 4096
+
+# Tokens: control word (with optional numeric parameter and delimiting space), hex byte, control symbol, group
+#   start or end, plain text, and line breaks (which are ignored in RTF text).
+_TOKEN = re.compile(r"\\([a-zA-Z]+)(-?\d+)? ?|\\'([0-9a-fA-F]{2})|\\([^a-zA-Z])|([{}])|([^\\{}\r\n]+)|[\r\n]+")
+
+_SURROGATE = re.compile("[\ud800-\udfff]")
+
+# Destinations whose content isn't part of the document text.
+SKIPPED_DESTINATIONS = {
+    "fonttbl", "colortbl", "stylesheet", "info", "pict", "object", "header", "headerl", "headerr", "headerf",
+    "footer", "footerl", "footerr", "footerf", "footnote", "fldinst", "listtable", "listoverridetable",
+    "revtbl", "rsidtbl", "themedata", "xmlnstbl", "NeXTGraphic"
+}
+
+# Control words and symbols that stand for characters.
+CONTROL_CHARACTERS = {
+    "par": "\n", "line": "\n", "sect": "\n", "page": "\n", "row": "\n", "tab": "\t", "cell": "\t",
+    "emdash": "\u2014", "endash": "\u2013", "emspace": "\u2003", "enspace": "\u2002", "qmspace": "\u2005",
+    "bullet": "\u2022", "lquote": "\u2018", "rquote": "\u2019", "ldblquote": "\u201c", "rdblquote": "\u201d",
+    "~": "\u00a0", "_": "\u2011", "-": "", "\n": "\n", "\r": "\n", "\\": "\\", "{": "{", "}": "}"
+}
+
+# Codepages used by the \ansi, \mac, \pc and \pca character set control words.
+CHARSET_CODEPAGES = {"ansi": "cp1252", "mac": "mac_roman", "pc": "cp437", "pca": "cp850"}
+
+
+def _codepage(name, default):
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return default
+
+
+class _Group:
+    __slots__ = ["skip", "uc"]
+
+    def __init__(self, skip=False, uc=1):
+        self.skip = skip            # Text in the group isn't part of the document
+        self.uc = uc                # Number of fallback characters following each \u
+
+
+def _hex_pieces(data, codepage, start):
+    text = data.decode(codepage, "replace")
+    if len(text) == len(data):
+        # Single-byte codepage: each \'hh escape is a character of its own.
+        for i, c in enumerate(text):
+            yield c, start + i * 4, start + i * 4 + 4, False
+    else:
+        yield text, start, start + len(data) * 4, False
+
+
+def iter_rtf_pieces(rtf):
+    """
+        Streams the text of an RTF string as (text, start, end, literal) pieces, where start and end are the span
+            of the RTF the text came from. 'literal' pieces are plain text, one character per character of the
+            RTF; other pieces come from escapes or control words. The span of a unicode escape includes its
+            fallback characters.
+    """
+    group = _Group()
+    stack = []
+    codepage = "cp1252"
+    pending = bytearray()       # Consecutive \'hh bytes, which may encode one multi-byte character
+    pending_start = 0
+    unicode = None              # [character, start, end] of a \u escape whose fallback is still being skipped
+    skip_chars = 0              # Fallback characters still to skip after a \u
+
+    for m in _TOKEN.finditer(rtf):
+        word, param, hex_byte, symbol, brace, text = m.groups()
+
+        if hex_byte is not None:
+            if skip_chars:
+                skip_chars -= 1
+                if unicode is not None:
+                    unicode[2] = m.end()
+            elif not group.skip:
+                if not pending:
+                    pending_start = m.start()
+                pending.append(int(hex_byte, 16))
+            continue
+
+        if pending:
+            yield from _hex_pieces(pending, codepage, pending_start)
+            pending.clear()
+
+        if text is None:
+            skip_chars = 0
+        elif skip_chars:
+            skipped = min(skip_chars, len(text))
+            if unicode is not None:
+                unicode[2] = m.start() + skipped
+            text, skip_chars = text[skipped:], skip_chars - skipped
+        if unicode is not None and not skip_chars:
+            yield unicode[0], unicode[1], unicode[2], False
+            unicode = None
+
+        if text is not None:
+            if not group.skip and text:
+                yield text, m.end() - len(text), m.end(), True
+        elif word is not None:
+            if word == "u" and param is not None:
+                value = int(param)
+                if not group.skip:
+                    unicode = [chr(value + 65536 if value < 0 else value), m.start(), m.end()]
+                skip_chars = group.uc
+            elif word == "uc" and param is not None:
+                group.uc = int(param)
+            elif word in SKIPPED_DESTINATIONS:
+                group.skip = True
+            elif word == "ansicpg" and param is not None:
+                codepage = _codepage("cp" + param, codepage)
+            elif word in CHARSET_CODEPAGES:
+                codepage = CHARSET_CODEPAGES[word]
+            elif word in CONTROL_CHARACTERS and not group.skip:
+                yield CONTROL_CHARACTERS[word], m.start(), m.end(), False
+        elif symbol is not None:
+            if symbol == "*":
+                group.skip = True       # Ignorable destination
+            elif symbol in CONTROL_CHARACTERS and not group.skip:
+                yield CONTROL_CHARACTERS[symbol], m.start(), m.end(), False
+        elif brace == "{":
+            stack.append(group)
+            group = _Group(group.skip, group.uc)
+        elif stack:
+            group = stack.pop()
+
+    if pending:
+        yield from _hex_pieces(pending, codepage, pending_start)
+    if unicode is not None:
+        yield unicode[0], unicode[1], unicode[2], False
+
+
+def iter_rtf_text(rtf):
+    """
+        Streams the text of an RTF string, yielding it in pieces as the control words are read.
+            Handles groups, skipped destinations, character escapes (\\'hh), unicode escapes (\\uN) and
+            the usual special characters. Formatting is ignored.
+    """
+    for piece in iter_rtf_pieces(rtf):
+        yield piece[0]
+
+
+def escape_rtf(text):
+    """ Returns text written as RTF. Characters outside ASCII are written as \\u escapes in their own group. """
+    parts = []
+    for c in text:
+        if c in "\\{}":
+            parts.append("\\" + c)
+        elif c == "\n":
+            parts.append("\\par ")
+        elif c == "\t":
+            parts.append("\\tab ")
+        elif ord(c) < 128:
+            parts.append(c)
+        else:
+            units = c.encode("utf-16-le")
+            for i in range(0, len(units), 2):
+                value = int.from_bytes(units[i:i + 2], "little")
+                parts.append("{\\uc1\\u%i?}" % (value - 65536 if value > 32767 else value))
+    return "".join(parts)
+
+
+@lru_cache(maxsize=RTF_CACHE_SIZE)
+def rtf_to_text(rtf):
+    """
+        Returns the plain text of an RTF string, without trailing line breaks. Results are cached by content,
+            as the same RTF is often repeated across slides and documents.
+    """
+    if not rtf:
+        return ""
+    text = "".join(iter_rtf_text(rtf)).rstrip("\n")
+    if _SURROGATE.search(text):
+        # Characters outside the BMP are written as pairs of \u surrogates.
+        text = text.encode("utf-16-le", "surrogatepass").decode("utf-16-le", "replace")
+    return text
@@ -1,5 +1,6 @@
 
 from .general import create_uuid, format_date
+from .intern import intern_attrib
 
 from abc import ABC, abstractmethod
 from datetime import datetime
@@ -48,6 +49,47 @@ def normalize_tree(tree):
     return tree
 
 
+class _FrozenValue:
+    """ Mixin for value objects shared as defaults. They can't be changed, and their string form is cached. """
+    _str = None
+
+    def _freeze(self, text):
+        object.__setattr__(self, "_str", text)
+
+    def __setattr__(self, name, value):
+        if self._str is not None:
+            raise AttributeError("'%s' is a shared default value and can't be changed. Assign a new %s instead." %
+                                 (self, type(self).__bases__[1].__name__))
+        object.__setattr__(self, name, value)
+
+    def __str__(self):
+        return self._str
+
+
+_default_elements = {}
+
+
+def _copy_element(element):
+    # Element.__copy__ shares the attribute dict with the original, so that's copied separately.
+    copied = element.__copy__()
+    copied.attrib = dict(element.attrib)
+    if len(element):
+        copied[:] = [_copy_element(child) for child in element]
+    return copied
+
+
+def default_element(cls, *args):
+    """
+        Returns the XML element for a default instance of an XmlBackedObject class, passing any args to write().
+            The element is only built once per class and args; each call returns a copy.
+    """
+    key = (cls,) + args
+    template = _default_elements.get(key)
+    if template is None:
+        template = _default_elements[key] = cls().write(*args)
+    return _copy_element(template)
+
+
 class XmlBackedObject(ABC):
     def __init__(self, tag, attrib=None):
         self._tag = tag
@@ -91,12 +133,9 @@ class XmlBackedObject(ABC):
         """ Updates this object to represent the given XML Element. """
         if element.tag != self._tag:
             raise TypeError("'%s' element could not be converted to a %s object." % (element.tag, self._tag))
-        self._attrib = element.attrib
 
-        # Convert empty strings to 'None' values.
-        for k, v in self._attrib.items():
-            if v == "":
-                self._attrib[k] = None
+        # Repeated names and values are shared between objects, and empty strings become 'None' values.
+        self._attrib = intern_attrib(element.attrib)
         return self
 
 
@@ -134,6 +173,12 @@ class ColorString:
             raise ValueError("Cannot parse string '%s' to ColorString. Expected 3-4 values, got %i." % (s, len(parts)))
 
 
+class FrozenColorString(_FrozenValue, ColorString):
+    def __init__(self, r, g, b, a=1.0):
+        super().__init__(r, g, b, a)
+        self._freeze(ColorString.__str__(self))
+
+
 class PointXY:
     def __init__(self, x=0.0, y=0.0):
         self.x = x
@@ -157,6 +202,17 @@ class PointXY:
         return cls(float(parts[0]), float(parts[1]))
 
 
+class FrozenPointXY(_FrozenValue, PointXY):
+    def __init__(self, x=0.0, y=0.0):
+        super().__init__(x, y)
+        self._freeze(PointXY.__str__(self))
+
+
+# Shared default values. Assigning new values is fine, but these objects can't be changed.
+DEFAULT_COLOR = FrozenColorString(0, 0, 0, 1)
+DEFAULT_SHADOW_SOURCE = FrozenPointXY(2.82843, -2.82843)
+
+
 class Rect3D(XmlBackedObject):
     def __init__(self, width=0.0, height=0.0, rotation=0.0, x=0.0, y=0.0):
         super().__init__("RVRect3D")
@@ -194,8 +250,8 @@ class Shadow(XmlBackedObject):
         super().__init__("shadow")
         self.enabled = False     # Not actually part of the object but used to set an attribute on the parent.
         self.radius = radius
-        self.color = color or ColorString(0, 0, 0, 1)
-        self.source = PointXY(2.82843, -2.82843)
+        self.color = color or DEFAULT_COLOR
+        self.source = DEFAULT_SHADOW_SOURCE
 
     def get_angle(self):
         x, y = self.source.x, self.source.y
@@ -258,7 +314,7 @@ class Stroke(XmlBackedObject):
         super().__init__("dictionary", {RV_XML_VARNAME: "stroke"})
         self.enabled = False     # Not part of the object just used to set a parent attribute.
         self.width = width
-        self.color = color or ColorString(0, 0, 0, 1)
+        self.color = color or DEFAULT_COLOR
 
     def write(self):
         e = super().write()
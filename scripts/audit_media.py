@@ -0,0 +1,53 @@
+from pro6.library import DocumentLibrary
+from pro6.preferences import get_install
+
+from argparse import ArgumentParser
+from os import path
+from sys import exit
+import time
+
+
+def main():
+    parser = ArgumentParser(description="Finds media referenced by documents and playlists that no longer exists.")
+    parser.add_argument("--library", type=str, help="The path to the library.")
+    parser.add_argument("--playlist", type=str, nargs='*', help="Paths of additional playlist documents to check.")
+    parser.add_argument("--workers", type=int, help="The number of files to check at once.")
+    args = parser.parse_args()
+    pro6_install = get_install()
+
+    playlists = [path.normpath(path.expanduser(path.expandvars(p))) for p in (args.playlist or [])]
+    if not args.library:
+        if not pro6_install:
+            print("ERROR: No library specified and a ProPresenter installation could not be found.")
+            exit(1)
+
+        library = DocumentLibrary.active
+        if args.playlist is None:
+            # Also check the playlists associated with the active library.
+            default = path.join(pro6_install.playlist_path, pro6_install.active_library + ".pro6pl")
+            if path.isfile(default):
+                playlists.append(default)
+    else:
+        title = path.basename(args.library[:-1] if args.library[-1] in ['/', '\\'] else args.library)
+        library = DocumentLibrary(args.library, title)
+
+    print("Auditing library '%s'..." % library.title)
+    started = time.perf_counter()
+    audit = library.audit_media(playlists, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print("Checked %i media files referenced %i times in %i files (%.2fs)." %
+          (audit.checked, len(audit.references), len(audit.files), elapsed))
+    for file_path, error in sorted(audit.errors.items()):
+        print("ERROR: Could not read '%s': %s" % (file_path, error))
+    print("Missing references: %i" % audit.missing_count)
+    for document, refs in sorted(audit.missing.items()):
+        print("%s:" % path.basename(document))
+        for ref in refs:
+            print("\t[%s] %s" % (ref.kind, ref.path))
+
+    exit(1 if audit.missing or audit.errors else 0)
+
+
+if __name__ == "__main__":
+    main()
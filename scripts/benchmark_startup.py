@@ -0,0 +1,47 @@
+from argparse import ArgumentParser
+from os import environ, listdir, path, pathsep
+import statistics
+import subprocess
+import sys
+import time
+
+
+SCRIPTS_DIR = path.dirname(path.abspath(__file__))
+
+
+def time_command(command, runs, env):
+    """ Runs a command several times and returns the wall clock time of each run, in seconds. """
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main():
+    parser = ArgumentParser(description="Measures the startup time of the pro6 package and each script.")
+    parser.add_argument("--runs", type=int, default=10, help="The number of times to run each command.")
+    args = parser.parse_args()
+
+    # Make sure the package next to the scripts is the one being measured.
+    env = dict(environ)
+    env["PYTHONPATH"] = pathsep.join(p for p in [path.dirname(SCRIPTS_DIR), env.get("PYTHONPATH")] if p)
+
+    commands = [
+        ("python (baseline)", [sys.executable, "-c", "pass"]),
+        ("import pro6.document", [sys.executable, "-c", "import pro6.document"]),
+        ("import pro6", [sys.executable, "-c", "import pro6"])
+    ]
+    for file in sorted(listdir(SCRIPTS_DIR)):
+        if file.endswith(".py") and file != path.basename(__file__):
+            commands.append((file + " --help", [sys.executable, path.join(SCRIPTS_DIR, file), "--help"]))
+
+    print("%-30s %10s %10s %10s" % ("Command", "Min (ms)", "Median", "Max"))
+    for name, command in commands:
+        timings = [t * 1000 for t in time_command(command, args.runs, env)]
+        print("%-30s %10.1f %10.1f %10.1f" % (name, min(timings), statistics.median(timings), max(timings)))
+
+
+if __name__ == "__main__":
+    main()
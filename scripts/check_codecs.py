@@ -0,0 +1,169 @@
+from pro6.util.constants import OS_WINDOWS, OS_MACOSX
+from pro6.util.general import format_date, parse_date, prepare_path, unprepare_path
+
+from argparse import ArgumentParser
+from datetime import datetime, timedelta, timezone
+from sys import exit
+from urllib.parse import quote, unquote, urlparse
+import os
+import pathlib
+import random
+
+
+# The implementations before they were cached and rewritten without strptime, which the current ones must match.
+def old_prepare_path(path_str, enviro):
+    pth = pathlib.Path(path_str)
+    if enviro == OS_WINDOWS:
+        return quote(os.path.normpath(pth.as_posix()))
+    else:
+        return pth.as_uri().replace("file:///", "file://localhost/")
+
+
+def old_unprepare_path(path_str):
+    if path_str is None:
+        return ""
+
+    pth = urlparse(path_str)
+    if pth.scheme == "file":
+        path_str = pth.path
+
+    path_str = unquote(path_str)
+    return os.path.expanduser(os.path.expandvars(path_str))
+
+
+def old_parse_date(s):
+    if not s or len(s) == 0:
+        return None
+    elif len(s) == 25:
+        s = s[:22] + s[23:]
+    return datetime.strptime(s, "%Y-%m-%dT%H:%M:%S%z")
+
+
+def old_format_date(dt):
+    s = dt.strftime("%Y-%m-%dT%H:%M:%S%z")
+    return s if len(s) == 19 else s[:22] + ':' + s[22:]
+
+
+class _SubclassedDatetime(datetime):
+    pass
+
+
+def outcome(func, *args):
+    """ Returns what a call did, as something comparable: the repr of its result, or the type of its exception. """
+    try:
+        return "returned", repr(func(*args))
+    except Exception as ex:
+        return "raised", type(ex).__name__
+
+
+def random_date_string(rng):
+    """ Returns a date string that's usually in the document format, and sometimes slightly or completely wrong. """
+    fields = [rng.choice([rng.randint(1, 9999), rng.randint(0, 99)]), rng.randint(0, 13), rng.randint(0, 32),
+              rng.randint(0, 24), rng.randint(0, 60), rng.randint(0, 61)]
+    widths = [4, 2, 2, 2, 2, 2]
+    if rng.random() < 0.2:
+        widths[rng.randrange(6)] = rng.choice([1, 3])
+    year, month, day, hour, minute, second = ("%0*d" % (w, f) for w, f in zip(widths, fields))
+
+    offset = rng.choice(["Z", "", "+", "-", "+00:00", "-00:00"] + ["%s%02d%s%02d" % (
+        rng.choice("+-"), rng.randint(0, 25), rng.choice([":", ":", ""]), rng.randint(0, 61)) for _ in range(6)])
+    s = "%s-%s-%sT%s:%s:%s%s" % (year, month, day, hour, minute, second, offset)
+
+    r = rng.random()
+    if r < 0.05:
+        s = s.replace("T", rng.choice([" ", "t", ""]))
+    elif r < 0.1:
+        i = rng.randrange(len(s))
+        s = s[:i] + rng.choice("0123456789:+-TZ x\u0661") + s[i + 1:]
+    elif r < 0.12:
+        s = rng.choice(["", None, "2016", "not a date", s + " ", " " + s])
+    return s
+
+
+def random_datetime(rng):
+    """ Returns a datetime with a random date and a UTC offset that's usually whole minutes, or no offset. """
+    dt = datetime(rng.choice([rng.randint(1, 999), rng.randint(1000, 9999)]), rng.randint(1, 12),
+                  rng.randint(1, 28), rng.randint(0, 23), rng.randint(0, 59), rng.randint(0, 59),
+                  rng.choice([0, rng.randint(0, 999999)]))
+    r = rng.random()
+    if r < 0.1:
+        tz = None
+    elif r < 0.2:
+        tz = timezone(timedelta(seconds=rng.randint(-86399, 86399), microseconds=rng.choice([0, 1, 500000])))
+    else:
+        tz = timezone(timedelta(minutes=rng.randint(-1439, 1439)))
+    dt = dt.replace(tzinfo=tz)
+
+    if rng.random() < 0.05:
+        dt = _SubclassedDatetime(dt.year, dt.month, dt.day, dt.hour, dt.minute, dt.second, tzinfo=dt.tzinfo)
+    return dt
+
+
+def random_path(rng):
+    """ Returns a file path or file URL mixing separators, escapes, variables and characters outside ASCII. """
+    pieces = ["Users", "Shared", "My Media", "C:", "C:\\Media", "..", ".", "", "100%", "%20", "%2F", "a%b",
+              "$HOME", "${HOME}", "%APPDATA%", "~", "~user", "song #1", "Café", "\u00e9\u0301", "\U0001f3b5",
+              "a?b", "[x]", "file.mov", "Slide &amp; Song", ";", "@", "q=1&r=2"]
+    parts = [rng.choice(pieces) for _ in range(rng.randint(0, 5))]
+    s = rng.choice(["/", "\\", ""]) + rng.choice(["/", "\\"]).join(parts)
+
+    r = rng.random()
+    if r < 0.2:
+        s = "file://localhost" + quote(s if s.startswith("/") else "/" + s)
+    elif r < 0.3:
+        s = "file:///" + quote(s.lstrip("/\\"))
+    elif r < 0.35:
+        s = quote(s)
+    return s
+
+
+def check(count, seed):
+    """ Compares the current and old implementations on random inputs. Returns a list of differences. """
+    rng = random.Random(seed)
+    differences = []
+
+    def compare(name, new, old, *args):
+        # Each input is checked twice, as the second call may come from a cache.
+        for _ in range(2):
+            new_outcome, old_outcome = outcome(new, *args), outcome(old, *args)
+            if new_outcome != old_outcome:
+                differences.append("%s%r: %s %s, was %s %s" % ((name, args) + new_outcome + old_outcome))
+                return
+
+    for _ in range(count):
+        compare("parse_date", parse_date, old_parse_date, random_date_string(rng))
+        compare("format_date", format_date, old_format_date, random_datetime(rng))
+
+        path_str = random_path(rng)
+        compare("unprepare_path", unprepare_path, old_unprepare_path, path_str)
+        for enviro in [OS_WINDOWS, OS_MACOSX]:
+            compare("prepare_path", prepare_path, old_prepare_path, path_str, enviro)
+
+    # Dates written by format_date must read back as the same time.
+    for _ in range(count // 10):
+        dt = random_datetime(rng).replace(microsecond=0)
+        if dt.year >= 1000 and dt.tzinfo is not None and dt.utcoffset() % timedelta(minutes=1) == timedelta(0):
+            if parse_date(format_date(dt)) != dt:
+                differences.append("format_date(%r) doesn't read back with parse_date." % dt)
+    return differences
+
+
+def main():
+    parser = ArgumentParser(description="Checks that parse_date, format_date, prepare_path and unprepare_path "
+                                        "behave exactly as their previous implementations on random inputs.")
+    parser.add_argument("--count", type=int, default=20000, help="The number of random inputs of each kind.")
+    parser.add_argument("--seed", type=int, default=None, help="The random seed, to repeat a run.")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    differences = check(args.count, seed)
+    for difference in differences[:50]:
+        print("FAILED:", difference)
+    if differences:
+        print("%i differences found with seed %i." % (len(differences), seed))
+        exit(1)
+    print("OK: %i inputs of each kind matched the previous implementations (seed %i)." % (args.count, seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+from pro6.document import DocumentCache, SlideGroup
+
+from argparse import ArgumentParser
+from sys import exit
+
+
+def check(file_path):
+    """ Returns a list of problems found when changing documents through DocumentCache handles. """
+    cache = DocumentCache()
+    problems = []
+
+    first, second = cache.load(file_path), cache.load(file_path)
+    title = second.category
+    groups = len(second.groups)
+    slides = len(second.slides())
+    view = second.read_only()
+    if (view.category, len(view.groups), len(view.slides())) != (title, groups, slides):
+        problems.append("The read-only view doesn't match the handle.")
+    if second.modified:
+        problems.append("Reading a handle made a copy of the document.")
+
+    # Values read from a handle that hasn't been edited can't be changed in place.
+    for change in [lambda: second.groups[0].slides.clear(), lambda: setattr(second.groups[0], "name", "Changed"),
+                   lambda: view.slides()[0].__setattr__("label", "Changed")]:
+        try:
+            change()
+            problems.append("A shared document was changed through a value read from a handle.")
+        except AttributeError:
+            pass
+
+    # Change the first handle in every way a caller might: methods, nested lists and plain attributes.
+    first.append(SlideGroup())
+    first.edit().groups[0].slides.clear()
+    first.slides().clear()
+    first.category = "Changed"
+
+    if not first.modified:
+        problems.append("The changed handle has no copy of its own.")
+    if second.modified:
+        problems.append("Changing one handle made a copy for another.")
+    if second.category != title:
+        problems.append("Setting an attribute changed another handle.")
+    if len(second.groups) != groups:
+        problems.append("Calling a method changed another handle.")
+    if len(second.slides()) != slides:
+        problems.append("Changing a nested list changed another handle.")
+
+    third = cache.load(file_path)
+    if (third.category, len(third.groups), len(third.slides())) != (title, groups, slides):
+        problems.append("Changes reached the cached document.")
+    return problems
+
+
+def main():
+    parser = ArgumentParser(description="Checks that changes made through one DocumentCache handle are never seen "
+                                        "by other handles of the same document.")
+    parser.add_argument("document", type=str, help="The path to a presentation document (.pro6).")
+    args = parser.parse_args()
+
+    problems = check(args.document)
+    for problem in problems:
+        print("FAILED:", problem)
+    if problems:
+        exit(1)
+    print("OK: handles of '%s' share the document until they're changed, and are copy-on-write." % args.document)
+
+
+if __name__ == "__main__":
+    main()
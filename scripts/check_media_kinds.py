@@ -0,0 +1,45 @@
+from pro6.library.export import read_document
+from pro6.library.metadata import DocumentMetadata
+from pro6.library.stream import REF_BACKGROUND, iter_media
+
+from argparse import ArgumentParser
+from sys import exit
+
+
+def check(file_path):
+    """
+        Returns a list of ways the streaming readers disagree with DocumentMetadata about which media are slide
+            backgrounds. Only the cue in each slide's 'backgroundMediaCue' slot is a background.
+    """
+    meta = DocumentMetadata(file_path)
+    meta.update()
+    problems = []
+
+    streamed = [ref.path for ref in iter_media(file_path) if ref.kind == REF_BACKGROUND]
+    if sorted(streamed) != sorted(meta.media):
+        problems.append("iter_media() found %i backgrounds in '%s', not %i." % (len(streamed), file_path,
+                                                                                  len(meta.media)))
+
+    exported = read_document(file_path)["media"]
+    if exported != meta.media:
+        problems.append("read_document() listed %i background media in '%s', not %i." % (len(exported), file_path,
+                                                                                           len(meta.media)))
+    return problems
+
+
+def main():
+    parser = ArgumentParser(description="Checks that media cues are only reported as slide backgrounds when they "
+                                        "are, by comparing the streaming readers with DocumentMetadata.")
+    parser.add_argument("documents", type=str, nargs='+', help="Paths of presentation documents (.pro6) to check.")
+    args = parser.parse_args()
+
+    problems = [problem for file_path in args.documents for problem in check(file_path)]
+    for problem in problems:
+        print("FAILED:", problem)
+    if problems:
+        exit(1)
+    print("OK: background media match in %i documents." % len(args.documents))
+
+
+if __name__ == "__main__":
+    main()
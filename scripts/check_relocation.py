@@ -0,0 +1,55 @@
+from pro6.library.relocate import RelocationRule, relocate_text
+
+from argparse import ArgumentParser
+from sys import exit
+
+
+# (old prefix, new prefix, path, expected result or None if the rule shouldn't apply)
+CASES = [
+    ("C:\\Users\\David\\Pictures\\", "D:\\Media\\", "C:\\Users\\David\\Pictures\\A\\a.jpg", "D:\\Media\\A\\a.jpg"),
+    ("C:/Users/David/Pictures/", "D:\\Media", "C:\\Users\\David\\Pictures\\a.jpg", "D:\\Media\\a.jpg"),
+    ("C:\\Users\\David\\Pictures\\", "D:\\Media", "c:\\users\\david\\pictures\\a.jpg", "D:\\Media\\a.jpg"),
+    ("C:\\Users\\David\\Pictures\\", "D:\\Media", "C:\\Users\\David\\Pictures2\\a.jpg", None),
+    ("C:\\", "E:\\", "C:\\Media\\a.jpg", "E:\\Media\\a.jpg"),
+    ("/Volumes/Media/", "/Users/Shared/Media/", "/Volumes/Media/Songs/a.mov", "/Users/Shared/Media/Songs/a.mov"),
+    ("/Volumes/Media/", "/Users/Shared/Media", "/Volumes/Media", "/Users/Shared/Media"),
+    ("/Volumes/Media/", "/Users/Shared/Media", "/Volumes/MediaOld/a.mov", None),
+    ("/Volumes/Media", "/Users/Shared/Media/", "/Volumes/Media/a.mov", "/Users/Shared/Media/a.mov"),
+    ("/", "/Volumes/Old/", "/Users/a.mov", "/Volumes/Old/Users/a.mov"),
+]
+
+# A document attribute relocated with a prefix ending in a separator.
+TEXT = '<RVVideoElement source="file://localhost/Volumes/Media/Songs/a%20b.mov"></RVVideoElement>'
+TEXT_MAPPING = [("/Volumes/Media/", "/Users/Shared/Media/")]
+TEXT_EXPECTED = '<RVVideoElement source="file://localhost/Users/Shared/Media/Songs/a%20b.mov"></RVVideoElement>'
+
+
+def check():
+    """ Returns a list of relocations that didn't give the expected result. """
+    problems = []
+    for old, new, file_path, expected in CASES:
+        result = RelocationRule(old, new).apply(file_path)
+        if result != expected:
+            problems.append("%r -> %r applied to %r gave %r, not %r." % (old, new, file_path, result, expected))
+
+    text, changes = relocate_text(TEXT, [RelocationRule(old, new) for old, new in TEXT_MAPPING])
+    if text != TEXT_EXPECTED or changes != 1:
+        problems.append("Relocating a document attribute gave %r (%i changes)." % (text, changes))
+    return problems
+
+
+def main():
+    parser = ArgumentParser(description="Checks that media relocation rules match the paths they should, "
+                                        "including prefixes that end with a separator and bare roots.")
+    parser.parse_args()
+
+    problems = check()
+    for problem in problems:
+        print("FAILED:", problem)
+    if problems:
+        exit(1)
+    print("OK: %i relocations gave the expected paths." % (len(CASES) + 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from pro6.library import DocumentLibrary, iter_slide_text
+
+from argparse import ArgumentParser
+from os import path
+from sys import exit
+import re
+import shutil
+import tempfile
+
+
+def check(document, copies=3):
+    """
+        Returns a list of problems found when a library's metadata is reloaded after its text index was built.
+            The library is made of copies of the given document, which needs a slide with some text on it.
+    """
+    words = [w for slide in iter_slide_text(document) for w in re.findall(r"\w{3,}", slide.text)]
+    if not words:
+        return ["The document has no text to search for."]
+    word = words[0]
+
+    problems = []
+    library_path = tempfile.mkdtemp(prefix="pro6-text-")
+    try:
+        for i in range(copies):
+            shutil.copyfile(document, path.join(library_path, "Copy %i.pro6" % i))
+        library = DocumentLibrary(library_path, "Check")
+
+        if not list(library.search_text(word)):
+            problems.append("Searching for '%s' found nothing." % word)
+        before = sorted(library.replace_text(word, word.upper(), dry_run=True))
+
+        library.load_metadata()
+        for hit in library.search_text(word):
+            if hit.document is not library.documents.get(hit.document.name) or not hit.document.loaded:
+                problems.append("After load_metadata(), search hits refer to replaced metadata.")
+                break
+        if any(meta is not library.documents.get(meta.name) for meta in library.text_index().candidates(word)):
+            problems.append("After load_metadata(), text index candidates are replaced metadata.")
+
+        after = sorted(library.replace_text(word, word.upper(), dry_run=True))
+        if after != before:
+            problems.append("After load_metadata(), replace_text() changed %i documents instead of %i." %
+                            (len(after), len(before)))
+    finally:
+        shutil.rmtree(library_path, ignore_errors=True)
+    return problems
+
+
+def main():
+    parser = ArgumentParser(description="Checks that a library's text search and find and replace still see every "
+                                        "document after its metadata is reloaded.")
+    parser.add_argument("document", type=str, help="The path to a presentation document (.pro6) with some text.")
+    args = parser.parse_args()
+
+    problems = check(args.document)
+    for problem in problems:
+        print("FAILED:", problem)
+    if problems:
+        exit(1)
+    print("OK: the text index follows reloaded metadata.")
+
+
+if __name__ == "__main__":
+    main()
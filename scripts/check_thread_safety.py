@@ -0,0 +1,145 @@
+from pro6.library import DocumentLibrary
+from pro6.util.locks import FileLock, _file_locks
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from os import path, remove
+from sys import exit
+import shutil
+import tempfile
+import threading
+import time
+
+
+def index_problems(library):
+    """ Returns a list of ways the library's indexes disagree with its documents. """
+    problems = []
+    with library.lock.read():
+        documents = {id(meta) for meta in library.documents.values()}
+        for name, meta in library.documents.items():
+            if library.titles.get(name) is not meta:
+                problems.append("'%s' can't be found by its title." % name)
+        if len(library.titles) != len(documents):
+            problems.append("The title index has %i documents, not %i." % (len(library.titles), len(documents)))
+        for field, index in library.fields.items():
+            if any(id(meta) not in documents for meta in index._keys):
+                problems.append("The %s index holds documents that were replaced or removed." % field)
+    return problems
+
+
+def stress(document, seconds, threads):
+    """ Uses a copy of a small library from many threads at once. Returns a list of problems found. """
+    problems = []
+    stop = threading.Event()
+    library_path = tempfile.mkdtemp(prefix="pro6-stress-")
+    counter_path = path.join(library_path, "counter.txt")
+    counts = {"lookups": 0, "refreshes": 0, "loads": 0, "deletes": 0, "locks": 0}
+    counts_lock = threading.Lock()
+
+    def count(name):
+        with counts_lock:
+            counts[name] += 1
+
+    def copy(name):
+        shutil.copyfile(document, path.join(library_path, name + ".pro6"))
+
+    def run(name, func):
+        def loop():
+            try:
+                while not stop.is_set():
+                    func()
+                    count(name)
+            except Exception as ex:
+                problems.append("%s failed: %r" % (name, ex))
+                stop.set()
+        return loop
+
+    for i in range(20):
+        copy("Song %02i" % i)
+    with open(counter_path, "w") as f:
+        f.write("0")
+    library = DocumentLibrary(library_path, "Stress")
+
+    def lookup():
+        for i in range(20):
+            title = "Song %02i" % i
+            library.get(title)
+            library.exists(title)
+            library.by_ccli(1)
+            library.by_category("Song")
+            library.used_between()
+        library.resolve(["song 1", "Sng 05", "Missing"])
+        library.fuzzy_search("Song")
+        problems.extend(index_problems(library))
+
+    def churn():
+        # Documents appear, change and disappear on disk while the library is in use.
+        for i in range(20, 30):
+            copy("Song %02i" % i)
+        library.refresh()
+        for i in range(20, 30):
+            remove(path.join(library_path, "Song %02i.pro6" % i))
+        library.refresh()
+
+    def delete():
+        copy("Temporary")
+        library.refresh()
+        library.delete("temporary")
+
+    def increment():
+        with FileLock(counter_path):
+            with FileLock(counter_path):    # Re-entrant
+                with open(counter_path) as f:
+                    value = int(f.read())
+                with open(counter_path, "w") as f:
+                    f.write(str(value + 1))
+
+    workers = [run("lookups", lookup) for _ in range(threads)] + \
+              [run("refreshes", churn), run("loads", library.load_metadata), run("deletes", delete)] + \
+              [run("locks", increment) for _ in range(threads)]
+
+    with ThreadPoolExecutor(len(workers)) as pool:
+        for worker in workers:
+            pool.submit(worker)
+        time.sleep(seconds)
+        stop.set()
+
+    library.refresh()
+    problems.extend(index_problems(library))
+    names = sorted(library.documents)
+    expected = ["Song %02i" % i for i in range(20)]
+    if names != expected:
+        problems.append("The library ended with %s instead of %s." % (names, expected))
+
+    with open(counter_path) as f:
+        value = int(f.read())
+    if value != counts["locks"]:
+        problems.append("The file lock let %i of %i increments be lost." % (counts["locks"] - value, counts["locks"]))
+    if _file_locks:
+        problems.append("%i file lock states were never released." % len(_file_locks))
+
+    shutil.rmtree(library_path, ignore_errors=True)
+    print(", ".join("%i %s" % (n, name) for name, n in sorted(counts.items())))
+    return problems
+
+
+def main():
+    parser = ArgumentParser(description="Uses a DocumentLibrary and FileLock from many threads at once, and checks "
+                                        "that the indexes and locked files stay consistent.")
+    parser.add_argument("document", type=str, help="The path to a presentation document (.pro6) to fill the "
+                                                   "library with.")
+    parser.add_argument("--seconds", type=float, default=10, help="How long to run for.")
+    parser.add_argument("--threads", type=int, default=4, help="The number of threads doing lookups, and the "
+                                                               "number taking file locks.")
+    args = parser.parse_args()
+
+    problems = stress(args.document, args.seconds, args.threads)
+    for problem in sorted(set(problems)):
+        print("FAILED:", problem)
+    if problems:
+        exit(1)
+    print("OK: no problems found.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,28 @@
 
+from pro6.daemon import connect
 from pro6.library import DocumentLibrary
+from pro6.library.index import MATCH_CASELESS, MATCH_PREFIX, MATCH_CONTAINS, MATCH_FUZZY
 from pro6.playlist import PlaylistDocument, PlaylistNode, NODE_FOLDER
-from pro6.preferences import install as pro6_install
+from pro6.preferences import get_install
 
 from argparse import ArgumentParser
 from os import path
 from sys import exit
 
 
+# Descriptions of the kinds of inexact title matches.
+MATCH_NAMES = {MATCH_CASELESS: "case-insensitive", MATCH_PREFIX: "prefix", MATCH_CONTAINS: "partial",
+               MATCH_FUZZY: "fuzzy"}
+
+
+def serves_library(client, title, library_path):
+    """ Returns True if a library daemon is serving the library with the given title and path. """
+    def normalize(p):
+        return path.normcase(path.normpath(path.expanduser(path.expandvars(p or ""))))
+    return (client.title or "").lower() == (title or "").lower() and \
+        normalize(client.path) == normalize(library_path)
+
+
 def main():
     parser = ArgumentParser(description="Creates a new ProPresenter playlist.")
     parser.add_argument("title", type=str, help="The title/path of the playlist. Use '\\n' to specify sub-folders.")
@@ -17,7 +32,10 @@ def main():
     parser.add_argument("--create-folders", action='store_true', help="If parent playlist folders should be created.")
     parser.add_argument("--overwrite", action='store_true', help="If the target playlist should be overwritten.")
     parser.add_argument("--document", type=str, help="The name or path of the playlist document to add the new list to.")
+    parser.add_argument("--fuzzy", action='store_true', help="If items may be matched to documents with similar "
+                                                            "rather than matching titles.")
     args = parser.parse_args()
+    pro6_install = get_install()
 
     library = None
     document = None
@@ -37,7 +55,13 @@ def main():
         if not args.document:
             document = PlaylistDocument.load(path.join(pro6_install.playlist_path, title + ".pro6pl"))
     elif pro6_install:
-        library = DocumentLibrary.active
+        # Use the library daemon if it's running and serving the active library, which it already has loaded.
+        library = connect()
+        if library and not serves_library(library, pro6_install.active_library, pro6_install.get_library()):
+            print("Not using the library daemon, which is serving '%s' rather than the active library." %
+                  library.title)
+            library = None
+        library = library or DocumentLibrary.active
         if not args.document:
             document = PlaylistDocument.active
 
@@ -62,7 +86,7 @@ def main():
                 parent = result
             elif args.create_folders:
                 node = PlaylistNode(item, NODE_FOLDER)
-                parent.children.append(node)
+                parent.add(node)
                 print("Created playlist node:", item)
                 parent = node
             else:
@@ -74,7 +98,7 @@ def main():
     playlist = parent.find(args.title)
     if playlist:
         if args.overwrite:
-            parent.children.remove(playlist)
+            parent.remove(playlist)
             print("Removed existing playlist:", playlist.name)
         else:
             print("ERROR: A playlist with the name '%s' already exists. Use --overwrite to replace it." % playlist.name)
@@ -82,25 +106,37 @@ def main():
 
     # Create the new playlist and add it.
     playlist = PlaylistNode(args.title)
-    parent.children.append(playlist)
+    parent.add(playlist)
+
+    # Find all of the library items at once.
+    paths = {item: path.normpath(path.expanduser(path.expandvars(item))) for item in args.items}
+    queries = [p for p in paths.values() if not path.isfile(p) and path.basename(path.splitext(p)[0]) == p]
+    if queries and not library:
+        print("ERROR: No library is available to search for documents.")
+        exit(1)
+    results = library.resolve(queries) if queries else {}
 
     # Add items to the playlist
     for item in args.items:
-        item_path = path.normpath(path.expanduser(path.expandvars(item)))
-        if not path.isfile(item_path) and path.basename(path.splitext(item_path)[0]) == item_path:
-            # It's not a file so check the library.
-            if library:
-                print("Searching library for '%s' ..." % item_path)
-                results = library.search(item_path)
-                if len(results) > 0:
-                    for meta in results:
-                        playlist.add_path(meta.path)
-                        print("Added library document:", meta.name)
-                else:
-                    print("ERROR: No results found for '%s' in the library." % item)
+        item_path = paths[item]
+        if item_path in results:
+            # It's not a file so use the best match from the library.
+            matches = results[item_path]
+            if len(matches) > 0:
+                match = matches[0]
+                meta = match.document
+                if match.kind == MATCH_FUZZY and not args.fuzzy:
+                    print("ERROR: No document titled '%s' was found. The closest is '%s'; use --fuzzy to accept "
+                          "similar titles." % (item, meta.name))
                     exit(1)
+
+                playlist.add_path(meta.path)
+                if match.kind in MATCH_NAMES:
+                    print("Added library document: %s (%s match for '%s')" % (meta.name, MATCH_NAMES[match.kind], item))
+                else:
+                    print("Added library document:", meta.name)
             else:
-                print("ERROR: No library is available to search for documents.")
+                print("ERROR: No results found for '%s' in the library." % item)
                 exit(1)
         else:
             playlist.add_path(item_path)
@@ -0,0 +1,41 @@
+from pro6.library import DocumentLibrary
+from pro6.preferences import get_install
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from os import path
+import sys
+
+
+def main():
+    parser = ArgumentParser(description="Exports the text and metadata of every document in a library as "
+                                        "newline-delimited JSON.")
+    parser.add_argument("--library", type=str, help="The path to the library.")
+    parser.add_argument("--output", type=str, help="The file to write to (default: standard output).")
+    parser.add_argument("--slides", action='store_true', help="Write one record per slide instead of per document.")
+    parser.add_argument("--unordered", action='store_true', help="Write documents as soon as they are read, "
+                                                                 "rather than in library order.")
+    parser.add_argument("--workers", type=int, help="The number of documents to read at once.")
+    parser.add_argument("--processes", action='store_true', help="Read documents in separate processes.")
+    args = parser.parse_args()
+
+    if not args.library:
+        if not get_install():
+            print("ERROR: No library specified and a ProPresenter installation could not be found.", file=sys.stderr)
+            sys.exit(1)
+        library = DocumentLibrary.active
+    else:
+        title = path.basename(args.library[:-1] if args.library[-1] in ['/', '\\'] else args.library)
+        library = DocumentLibrary(args.library, title)
+
+    executor = ProcessPoolExecutor(args.workers) if args.processes else None
+    try:
+        count = library.export(args.output, args.slides, not args.unordered, args.workers, executor)
+    finally:
+        if executor:
+            executor.shutdown()
+    print("Exported %i records from library '%s'." % (count, library.title), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 
 from pro6.document import PresentationDocument, MediaCue
-from pro6.preferences import install as pro6_install
+from pro6.preferences import get_install
 from pro6.util.constants import *
 
 from argparse import ArgumentParser
@@ -37,6 +37,7 @@ def import_file(document, file_path):
 
 def main():
     # Look for a ProPresenter installation to use default values from.
+    pro6_install = get_install()
     if pro6_install:
         default_size = (pro6_install.output_width, pro6_install.output_height)
         scaling = {v: k for k, v in SCALE_MODES.items()}.get(pro6_install.foreground_scaling)
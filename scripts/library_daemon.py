@@ -0,0 +1,49 @@
+from pro6.daemon import LibraryServer, LibraryService
+from pro6.library import DocumentLibrary
+from pro6.util.constants import DAEMON_HOST, DAEMON_PORT
+
+from argparse import ArgumentParser
+from os import path
+from sys import exit
+
+
+def main():
+    parser = ArgumentParser(description="Keeps a ProPresenter library loaded and answers queries from other scripts.")
+    parser.add_argument("--library", type=str, help="The name of an installed library or the path to a library.")
+    parser.add_argument("--playlist", type=str, help="The path to the playlist document to serve.")
+    parser.add_argument("--port", type=int, default=DAEMON_PORT, help="The local port to listen on.")
+    parser.add_argument("--interval", type=float, default=2.0, help="Seconds between checks for library changes.")
+    parser.add_argument("--no-metadata", action='store_true', help="Don't read document metadata on startup.")
+    args = parser.parse_args()
+
+    try:
+        if args.library and path.isdir(args.library):
+            library = DocumentLibrary(args.library)
+            service = LibraryService(library, args.playlist, args.interval)
+        else:
+            service = LibraryService.from_install(args.library, args.interval)
+            if args.playlist:
+                service.playlist_path = args.playlist
+    except Exception as ex:
+        print("ERROR: %s" % ex)
+        exit(1)
+
+    if not args.no_metadata:
+        print("Loading metadata for library '%s'..." % service.library.title)
+        service.library.load_metadata()
+        for file_path, error in sorted(service.library.errors.items()):
+            print("ERROR: Could not read '%s': %s" % (file_path, error))
+
+    server = LibraryServer(service, DAEMON_HOST, args.port)
+    print("Serving library '%s' (%i documents) on http://%s:%i/" %
+          (service.library.title, len(service.library.documents), DAEMON_HOST, args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+from pro6.library import DocumentLibrary
+from pro6.preferences import get_install
+
+from argparse import ArgumentParser
+from os import path
+from sys import exit
+
+
+def main():
+    parser = ArgumentParser(description="Moves media references in documents and playlists to a new location.")
+    parser.add_argument("--map", type=str, nargs=2, action="append", metavar=("OLD", "NEW"), required=True,
+                        help="A path prefix to replace and its replacement. Can be given multiple times.")
+    parser.add_argument("--library", type=str, help="The path to the library.")
+    parser.add_argument("--playlist", type=str, nargs='*', help="Paths of additional playlist documents to update.")
+    parser.add_argument("--dry-run", action='store_true', help="Report changes without saving them.")
+    parser.add_argument("--workers", type=int, help="The number of files to process at once.")
+    args = parser.parse_args()
+    pro6_install = get_install()
+
+    playlists = [path.normpath(path.expanduser(path.expandvars(p))) for p in (args.playlist or [])]
+    if not args.library:
+        if not pro6_install:
+            print("ERROR: No library specified and a ProPresenter installation could not be found.")
+            exit(1)
+
+        library = DocumentLibrary.active
+        if args.playlist is None:
+            # Also update the playlists associated with the active library.
+            default = path.join(pro6_install.playlist_path, pro6_install.active_library + ".pro6pl")
+            if path.isfile(default):
+                playlists.append(default)
+    else:
+        title = path.basename(args.library[:-1] if args.library[-1] in ['/', '\\'] else args.library)
+        library = DocumentLibrary(args.library, title)
+
+    for old, new in args.map:
+        print("Relocating '%s' -> '%s'" % (old, new))
+
+    results = library.relocate_media(args.map, playlists, args.dry_run, args.workers)
+    changed = {fp: count for fp, count in results.items() if count > 0}
+    for file_path, count in sorted(changed.items()):
+        print("\t%s: %i" % (path.basename(file_path), count))
+
+    print("%s %i references in %i of %i files." % ("Would update" if args.dry_run else "Updated",
+                                                   sum(changed.values()), len(changed), len(results)))
+
+
+if __name__ == "__main__":
+    main()
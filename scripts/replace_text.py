@@ -0,0 +1,40 @@
+from pro6.library import DocumentLibrary, format_changes
+from pro6.preferences import get_install
+
+from argparse import ArgumentParser
+from os import path
+from sys import exit
+
+
+def main():
+    parser = ArgumentParser(description="Finds and replaces text in the slides of every document in a library.")
+    parser.add_argument("find", type=str, help="The text to find.")
+    parser.add_argument("replace", type=str, help="The text to replace it with.")
+    parser.add_argument("--regex", action='store_true', help="Treat the text to find as a regular expression. "
+                                                             "The replacement can then refer to groups (\\1).")
+    parser.add_argument("--ignore-case", action='store_true', help="Ignore case when finding the text.")
+    parser.add_argument("--library", type=str, help="The path to the library.")
+    parser.add_argument("--dry-run", action='store_true', help="Show the changes without saving them.")
+    parser.add_argument("--workers", type=int, help="The number of documents to process at once.")
+    args = parser.parse_args()
+
+    if not args.library:
+        if not get_install():
+            print("ERROR: No library specified and a ProPresenter installation could not be found.")
+            exit(1)
+        library = DocumentLibrary.active
+    else:
+        title = path.basename(args.library[:-1] if args.library[-1] in ['/', '\\'] else args.library)
+        library = DocumentLibrary(args.library, title)
+
+    print("Replacing '%s' with '%s' in library '%s'..." % (args.find, args.replace, library.title))
+    results = library.replace_text(args.find, args.replace, args.regex, args.ignore_case, args.dry_run, args.workers)
+    if args.dry_run and results:
+        print(format_changes(results))
+
+    count = sum(change.count for changes in results.values() for change in changes)
+    print("%s %i matches in %i documents." % ("Would replace" if args.dry_run else "Replaced", count, len(results)))
+
+
+if __name__ == "__main__":
+    main()
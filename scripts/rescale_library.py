@@ -0,0 +1,41 @@
+from pro6.library import DocumentLibrary, RESCALE_STRETCH, RESCALE_FIT, RESCALE_FILL
+from pro6.preferences import get_install
+
+from argparse import ArgumentParser
+from os import path
+from sys import exit
+
+
+def main():
+    parser = ArgumentParser(description="Changes the resolution of every document in a library.")
+    parser.add_argument("width", type=int, help="The new output width.")
+    parser.add_argument("height", type=int, help="The new output height.")
+    parser.add_argument("--mode", type=str, choices=[RESCALE_STRETCH, RESCALE_FIT, RESCALE_FILL],
+                        default=RESCALE_STRETCH, help="How to handle a change in aspect ratio. 'fit' adds bars "
+                                                      "(letterbox/pillarbox) and 'fill' crops.")
+    parser.add_argument("--library", type=str, help="The path to the library.")
+    parser.add_argument("--dry-run", action='store_true', help="Report changes without saving them.")
+    parser.add_argument("--workers", type=int, help="The number of documents to process at once.")
+    args = parser.parse_args()
+
+    if not args.library:
+        if not get_install():
+            print("ERROR: No library specified and a ProPresenter installation could not be found.")
+            exit(1)
+        library = DocumentLibrary.active
+    else:
+        title = path.basename(args.library[:-1] if args.library[-1] in ['/', '\\'] else args.library)
+        library = DocumentLibrary(args.library, title)
+
+    print("Rescaling library '%s' to %ix%i (%s)..." % (library.title, args.width, args.height, args.mode))
+    results = library.rescale(args.width, args.height, args.mode, args.dry_run, args.workers)
+    changed = {fp: count for fp, count in results.items() if count > 0}
+    for file_path, count in sorted(changed.items()):
+        print("\t%s: %i" % (path.basename(file_path), count))
+
+    print("%s %i values in %i of %i documents." % ("Would update" if args.dry_run else "Updated",
+                                                  sum(changed.values()), len(changed), len(results)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 
 from pro6.document import PresentationDocument
-from pro6.preferences import install as pro6_install
+from pro6.preferences import get_install
 
 from argparse import ArgumentParser
 from os import path
@@ -11,6 +11,7 @@ def main():
     parser = ArgumentParser(description="Resets thumbnails for media associated with a document.")
     parser.add_argument("document", type=str, help="The path to or name of the document to reset.")
     args = parser.parse_args()
+    pro6_install = get_install()
 
     # Check if a document name was given instead of a path and resolve it.
     if not args.document.endswith(".pro6"):
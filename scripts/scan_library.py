@@ -1,6 +1,6 @@
 
-from pro6.library import DocumentLibrary
-from pro6.preferences import install as pro6_install
+from pro6.library import DocumentLibrary, LibraryCatalog
+from pro6.preferences import get_install
 
 from argparse import ArgumentParser
 from os import path
@@ -10,7 +10,13 @@ from sys import exit
 def main():
     parser = ArgumentParser(description="Returns information on a ProPresenter library.")
     parser.add_argument("--library", type=str, help="The path to the library.")
+    parser.add_argument("--all", action='store_true', help="Scan every library of the ProPresenter installation.")
     args = parser.parse_args()
+    pro6_install = get_install()
+
+    if args.all:
+        scan_all(pro6_install)
+        return
 
     library = None
     if not args.library:
@@ -25,23 +31,42 @@ def main():
 
     print("Loading library '%s'..." % library.title)
     library.load_metadata()
+    for file_path, error in sorted(library.errors.items()):
+        print("ERROR: Could not read '%s': %s" % (file_path, error))
 
-    categories = {}
-    not_used = []
-    for name, doc in library.documents.items():
-        if doc.category not in categories:
-            categories[doc.category] = []
-        categories[doc.category].append(doc)
-
-        if not doc.last_used:
-            not_used.append(doc)
+    columns = library.columns()
+    categories = columns.group_count("category")
+    not_used = columns.rows_to_documents(columns.select(never_used=True))
 
     print("Scanned %i documents." % len(library.documents))
-    print("Categories:", ', '.join(["%s (%i)" % (k, len(v)) for k,v in categories.items()]))
+    print("Categories:", ', '.join(["%s (%i)" % (k, v) for k, v in categories.items()]))
     print("Documents not used: %i" % len(not_used))
     for doc in not_used:
         print("\t%s" % doc.name)
 
 
+def scan_all(pro6_install):
+    if not pro6_install:
+        print("ERROR: A ProPresenter installation could not be found.")
+        exit(1)
+
+    print("Loading %i libraries..." % len(pro6_install.libraries))
+    catalog = LibraryCatalog.from_install(pro6_install).scan()
+    for title, error in catalog.errors.items():
+        print("ERROR: Could not scan library '%s': %s" % (title, error))
+    for library in catalog.libraries.values():
+        for file_path, error in sorted(library.errors.items()):
+            print("ERROR: Could not read '%s': %s" % (file_path, error))
+
+    stats = catalog.stats()
+    for title, lib_stats in stats["libraries"].items():
+        print("%s: %i documents, %i slides, %i not used" %
+              (title, lib_stats["documents"], lib_stats["slides"], lib_stats["unused"]))
+
+    print("Scanned %i documents." % stats["documents"])
+    print("Categories:", ', '.join(["%s (%i)" % (k, v) for k, v in stats["categories"].items()]))
+    print("Documents not used: %i" % stats["unused"])
+
+
 if __name__ == "__main__":
     main()
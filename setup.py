@@ -10,5 +10,6 @@ setup(
     author="Davnit",
     author_email="david@davnit.net",
     packages=find_packages(),
-    install_requires=["hachoir>=3.0a3"]
+    install_requires=["hachoir>=3.0a3"],
+    extras_require={"numpy": ["numpy"]}
 )